@@ -0,0 +1,116 @@
+"""Barridos con timeouts fijos vs adaptativos por subred (RTT_ESTIMATOR).
+
+Simula la red reemplazando asyncio.open_connection y el ping de main por modelos
+de latencia: subredes LAN (RTT ~0,5 ms, mayoría de hosts apagados que descartan
+el SYN) y una subred WAN (RTT 60-140 ms, con algunos hosts lentos de ~400 ms).
+Corre varios barridos completos como los del servicio de sondeo y reporta la
+duración de cada uno y los falsos negativos (hosts encendidos con el puerto
+abierto que el barrido dio por cerrado).
+
+Uso:
+    python bench/bench_adaptive_timeouts.py [--lan 4] [--offline 0.7] [--sweeps 3]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+
+def build_network(lan_subnets, offline_ratio, seed):
+    """ip -> (rtt en segundos o None si está apagado, puertos abiertos)"""
+    rng = random.Random(seed)
+    network = {}
+    for subnet in range(lan_subnets + 1):
+        wan = subnet == lan_subnets
+        for host in range(1, 255):
+            ip = f"10.{200 if wan else 10}.{subnet}.{host}"
+            if rng.random() < (0.2 if wan else offline_ratio):
+                network[ip] = (None, set())
+                continue
+            if wan:
+                rtt = 0.4 if rng.random() < 0.05 else rng.uniform(0.06, 0.14)
+            else:
+                rtt = rng.uniform(0.0002, 0.001)
+            ports = {port for port in (main.ssh_port, 3389) if rng.random() < 0.5}
+            network[ip] = (rtt, ports)
+    return network
+
+
+def install_network(network):
+    """Reemplaza las primitivas de red por el modelo simulado"""
+    async def open_connection(ip, port):
+        rtt, ports = network[ip]
+        if rtt is None:
+            await asyncio.sleep(3600)  # SYN descartado: sólo el timeout lo corta
+        await asyncio.sleep(rtt * random.uniform(0.9, 1.3))
+        if port not in ports:
+            raise ConnectionRefusedError(ip, port)
+        return None, _Writer()
+
+    async def ping_rtt(ip, timeout):
+        rtt, _ = network[ip]
+        if rtt is None or rtt > timeout:
+            await asyncio.sleep(timeout)
+            return None
+        await asyncio.sleep(rtt)
+        return rtt * 1000
+
+    asyncio.open_connection = open_connection
+    main._ping_rtt = ping_rtt
+
+
+class _Writer:
+    def close(self):
+        pass
+
+    async def wait_closed(self):
+        pass
+
+
+async def sweep(network, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    false_negatives = 0
+
+    async def probe(ip):
+        nonlocal false_negatives
+        async with semaphore:
+            online, ssh_open, rdp_open, _ = await main.probe_host(ip, main.ssh_port)
+        _, ports = network[ip]
+        false_negatives += (main.ssh_port in ports and not ssh_open) + (3389 in ports and not rdp_open)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(probe(ip) for ip in network))
+    return time.perf_counter() - started, false_negatives
+
+
+def run(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lan', type=int, default=4, help="Subredes /24 de LAN")
+    parser.add_argument('--offline', type=float, default=0.7, help="Fracción de hosts LAN apagados")
+    parser.add_argument('--sweeps', type=int, default=3)
+    parser.add_argument('--concurrency', type=int, default=256)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    network = build_network(args.lan, args.offline, args.seed)
+    install_network(network)
+    print(f"{len(network)} hosts ({args.lan} /24 LAN + 1 /24 WAN), {args.offline:.0%} de la LAN apagada")
+    print(f"{'modo':<11} {'barrido':>8} {'segundos':>9} {'falsos neg.':>12}")
+    for adaptive in (False, True):
+        main.RTT_ESTIMATOR = main.SubnetRttEstimator({'adaptive': adaptive})
+        mode = 'adaptativo' if adaptive else 'fijo'
+        for n in range(1, args.sweeps + 1):
+            seconds, false_negatives = asyncio.run(sweep(network, args.concurrency))
+            print(f"{mode:<11} {n:>8} {seconds:>9.2f} {false_negatives:>12}")
+        if adaptive:
+            print(main.RTT_ESTIMATOR.describe())
+
+
+if __name__ == '__main__':
+    run()
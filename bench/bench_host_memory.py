@@ -0,0 +1,64 @@
+"""Memoria del inventario: dicts de get_all_records() vs HostRecord.
+
+Genera N hosts sintéticos con la forma de la hoja real (titulares, usuarios y
+contraseñas repetidos, IPs en pocas VLANs) y mide con tracemalloc cuánto ocupa
+cada representación, normalizado a 10k hosts. Las filas crudas se generan dentro
+de la medición en ambos casos: lo que queda de ellas en los HostRecord (strings
+internados) cuenta, lo que se descarta no.
+
+Uso:
+    python bench/bench_host_memory.py [--hosts 10000]
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+
+def raw_rows(count):
+    """Filas como las devuelve la hoja: strings nuevos en cada fila."""
+    rows = []
+    for i in range(count):
+        rows.append({
+            'titular': ''.join(['Área ', str(i % 40)]),
+            'hostname': ''.join(['PC-', str(i).zfill(5)]),
+            'ip': '.'.join(['192', '168', str(i // 254 % 256), str(i % 254 + 1)]),
+            'usuario': ''.join(['admin', str(i % 3)]),
+            'contrasenia': ''.join(['clave', str(i % 5)]),
+        })
+    return rows
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    data = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, data
+
+
+def run(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hosts', type=int, default=10000)
+    args = parser.parse_args(argv)
+    scale = 10000 / args.hosts
+
+    dict_bytes, _ = measure(lambda: raw_rows(args.hosts))
+    record_bytes, _ = measure(
+        lambda: [main.HostRecord.from_record(main.normalize_record(r)) for r in raw_rows(args.hosts)]
+    )
+
+    print(f"{'representación':<16} {'bytes/10k hosts':>16} {'bytes/host':>12}")
+    for name, total in (('dict', dict_bytes), ('HostRecord', record_bytes)):
+        print(f"{name:<16} {total * scale:>16,.0f} {total / args.hosts:>12.0f}")
+    print(f"HostRecord / dict: {record_bytes / dict_bytes:.2f}")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,72 @@
+"""Benchmark de escalado del sondeo multiproceso por shards.
+
+Sondea N direcciones de loopback (127.x.y.z) en puertos cerrados y sin ping, de
+modo que el costo es el del propio iTool (conexiones TCP, bookkeeping, escritura
+del array compartido) y no el de la red. Mide un barrido completo para cada
+cantidad de workers.
+
+Uso:
+    python bench/bench_probe_shards.py [--hosts 10000] [--workers 1,2,4,8] [--strategy subnet]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+
+def loopback_hosts(count, port):
+    hosts = []
+    for i in range(count):
+        subnet, host = divmod(i, 254)
+        hosts.append(main.HostRecord(
+            hostname=f"lo-{i}", ip=f"127.{subnet >> 8}.{subnet & 255}.{host + 1}", puerto_ssh=str(port)
+        ))
+    return hosts
+
+
+def sweep_seconds(hosts, workers, strategy, concurrency):
+    prober = main.ShardedProber(
+        workers, strategy, interval=3600, concurrency=concurrency, probe_ping=False
+    )
+    started = time.time()
+    prober.start(hosts)
+    try:
+        pending = set(range(len(hosts)))
+        while pending:
+            time.sleep(0.05)
+            pending = {
+                i for i in pending
+                if (prober.status_at(i) or main.ProbeStatus(0, 0, 0, None, 0)).checked_at < started
+            }
+        return time.time() - started
+    finally:
+        prober.stop()
+
+
+def run(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hosts', type=int, default=10000)
+    parser.add_argument('--workers', default=','.join(
+        str(n) for n in (1, 2, 4, 8, 16) if n <= (os.cpu_count() or 1)
+    ))
+    parser.add_argument('--strategy', choices=main.SHARD_STRATEGIES, default='subnet')
+    parser.add_argument('--concurrency', type=int, default=256)
+    parser.add_argument('--port', type=int, default=9, help="Puerto cerrado a sondear")
+    args = parser.parse_args(argv)
+
+    hosts = loopback_hosts(args.hosts, args.port)
+    print(f"{len(hosts)} hosts, estrategia {args.strategy}, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'segundos':>10} {'hosts/s':>10} {'speedup':>8}")
+    baseline = None
+    for workers in (int(n) for n in args.workers.split(',')):
+        seconds = sweep_seconds(hosts, workers, args.strategy, args.concurrency)
+        baseline = baseline or seconds
+        print(f"{workers:>8} {seconds:>10.2f} {len(hosts) / seconds:>10.0f} {baseline / seconds:>7.2f}x")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,57 @@
+"""Latencia por tecla de la paleta de conexión rápida (QuickConnectIndex).
+
+Simula el tipeo de varias consultas, carácter por carácter, sobre N hosts
+sintéticos y reporta el tiempo de cada tecla (cada una es una búsqueda completa
+sobre el índice) y el tiempo de armado del índice.
+
+Uso:
+    python bench/bench_quick_connect.py [--hosts 10000] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+QUERIES = ('pc-0123', '10.0.17.', 'sala 42', 'contab', 'pc12ofi', 'zzz')
+
+
+def synthetic_hosts(count):
+    rooms = ('SALA', 'OFI', 'LAB', 'DEP')
+    return [
+        main.HostRecord(
+            f"Área {i % 40} Contabilidad", f"PC-{i:05d}-{rooms[i % 4]}",
+            f"10.{i // 65024}.{i // 254 % 256}.{i % 254 + 1}", 'admin', 'clave'
+        )
+        for i in range(count)
+    ]
+
+
+def run(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hosts', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    records = synthetic_hosts(args.hosts)
+    started = time.perf_counter()
+    index = main.QuickConnectIndex(records)
+    print(f"{args.hosts} hosts, índice armado en {(time.perf_counter() - started) * 1000:.1f} ms")
+    print(f"{'consulta':<10} {'mediana ms/tecla':>17} {'peor ms/tecla':>14} {'resultados':>11}")
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            index.search('')
+            for end in range(1, len(query) + 1):
+                started = time.perf_counter()
+                results = index.search(query[:end])
+                timings.append((time.perf_counter() - started) * 1000)
+        print(f"{query:<10} {statistics.median(timings):>17.2f} {max(timings):>14.2f} {len(results):>11}")
+
+
+if __name__ == '__main__':
+    run()
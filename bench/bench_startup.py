@@ -0,0 +1,69 @@
+"""Tiempo de arranque de iTool: imports, primera ventana y primer grid.
+
+Lanza la app N veces en procesos nuevos (arranque en frío del intérprete o del
+ejecutable de PyInstaller) con un inventario CSV sintético y --startup-report,
+que escribe los hitos de arranque y cierra la ventana al dibujar el primer grid.
+Reporta la mediana de cada hito y del tiempo total de proceso.
+
+Necesita un display (en Linux sin escritorio: xvfb-run python bench/bench_startup.py).
+
+Uso:
+    python bench/bench_startup.py [--runs 5] [--hosts 500] [--exe dist/iTool]
+"""
+import argparse
+import csv
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARKS = ('imports', 'first_frame', 'first_grid', 'first_grid_drawn', 'inventory_loaded')
+
+
+def write_fixture(path, count):
+    with open(path, 'w', newline='', encoding='utf-8') as fh:
+        writer = csv.writer(fh)
+        writer.writerow(['titular', 'hostname', 'ip', 'usuario', 'contrasenia'])
+        for i in range(count):
+            # Rango de documentación (TEST-NET-2): los sondeos no salen a la red real
+            writer.writerow([f"Área {i % 40}", f"PC-{i:05d}", f"198.51.100.{i % 254 + 1}", 'admin', 'clave'])
+
+
+def launch(command, report):
+    started = time.perf_counter()
+    subprocess.run(command + ['--startup-report', report], cwd=ROOT, check=True, timeout=120)
+    wall = time.perf_counter() - started
+    with open(report, encoding='utf-8') as fh:
+        marks = json.load(fh)
+    marks['proceso'] = wall
+    return marks
+
+
+def run(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--hosts', type=int, default=500)
+    parser.add_argument('--exe', help="Ejecutable de PyInstaller en lugar de 'python main.py'")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture = os.path.join(tmp, 'inventario.csv')
+        write_fixture(fixture, args.hosts)
+        command = [args.exe] if args.exe else [sys.executable, os.path.join(ROOT, 'main.py')]
+        command += ['--inventory', f"csv:{fixture}", '--probe-workers', '0']
+        results = [launch(command, os.path.join(tmp, f"arranque-{n}.json")) for n in range(args.runs)]
+
+    print(f"{args.runs} arranques, {args.hosts} hosts: {' '.join(command[:2])}")
+    print(f"{'hito':<18} {'mediana (s)':>12} {'mín (s)':>10}")
+    for name in MARKS + ('proceso',):
+        values = [r[name] for r in results if name in r]
+        if values:
+            print(f"{name:<18} {statistics.median(values):>12.3f} {min(values):>10.3f}")
+
+
+if __name__ == '__main__':
+    run()
@@ -1,9 +1,9 @@
+import time
+STARTUP_T0 = time.perf_counter()  # Referencia para el reporte de arranque (--startup-report)
 import tempfile
 import tkinter as tk
 from tkinter import ttk
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-from pythonping import ping
+from tkinter import font as tkfont
 import threading
 import subprocess
 import os
@@ -13,34 +13,38 @@ from concurrent.futures import ThreadPoolExecutor
 import ipaddress
 import socket
 import logging
+import logging.handlers
+import atexit
 from functools import partial
+from operator import attrgetter, itemgetter
 import platform
 import shutil
 import shlex
 import sys
-
-# Configuración de logging
-try:
-    log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
-    os.makedirs(log_dir, exist_ok=True)
-    log_file = os.path.join(log_dir, 'itool.log')
-except Exception:
-    # Fallback al archivo en el cwd si no se puede crear la carpeta
-    log_file = 'itool.log'
-
-logging.basicConfig(
-    filename=log_file,
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    filemode='a'
-)
-
-# También mostrar logs en consola
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
-formatter = logging.Formatter('%(levelname)s - %(message)s')
-console_handler.setFormatter(formatter)
-logging.getLogger().addHandler(console_handler)
+import json
+import csv
+import sqlite3
+import queue
+import argparse
+import abc
+import multiprocessing
+import struct
+import math
+import errno
+import heapq
+import bisect
+import re
+from collections import namedtuple
+from array import array
+# gspread/oauth2client (Google Sheets) y pythonping se importan recién cuando se usan:
+# ver SheetsInventory._connect y async_ping_rtt.
+
+# --- Hitos de arranque (segundos desde STARTUP_T0) ---
+STARTUP_MARKS = {'imports': time.perf_counter() - STARTUP_T0}
+
+def mark_startup(name):
+    """Registra un hito de arranque la primera vez que ocurre"""
+    STARTUP_MARKS.setdefault(name, time.perf_counter() - STARTUP_T0)
 
 # --- Helpers para rutas de recursos (compatible con PyInstaller) ---
 def _resource_base_dir():
@@ -53,264 +57,2258 @@ def _resource_base_dir():
 
 BASE_DIR = _resource_base_dir()
 
+# --- Configuración de la aplicación (config.json opcional) ---
+def _app_dir():
+    """Carpeta del ejecutable (PyInstaller) o del script; ahí se busca config.json."""
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(os.path.abspath(sys.executable))
+    return os.path.dirname(os.path.abspath(__file__))
+
+APP_DIR = _app_dir()
+CONFIG_PATH = os.path.join(APP_DIR, 'config.json')
+
+def load_config(path=CONFIG_PATH):
+    """Lee config.json si existe. Un archivo ausente o inválido equivale a {}."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception as e:
+        logging.warning("No se pudo leer %s: %s", path, e)
+        return {}
+
+CONFIG = load_config()
+
+# --- Configuración de logging ---
+# Pipeline no bloqueante: los hilos que loguean sólo encolan el LogRecord; un hilo
+# listener formatea y escribe (archivo rotado por tamaño/antigüedad + consola).
+LOG_DEFAULTS = {
+    'max_bytes': 5 * 1024 * 1024,  # Rotar al superar este tamaño
+    'backup_count': 5,             # Archivos rotados a conservar
+    'max_age_hours': 24 * 7,       # Rotar también si el archivo tiene más de N horas
+    'rate_limit': 20,              # Máx. mensajes DEBUG/INFO iguales por ventana
+    'rate_window': 10,             # Ventana del rate limit en segundos
+}
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'  # Prefijo de %(asctime)s (sin los milisegundos)
+
+class SizeAgeRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler que además rota cuando el archivo supera una antigüedad.
+
+    La antigüedad se cuenta desde el primer registro del archivo: el mtime es la
+    última escritura y en un puesto que se reinicia a diario nunca llegaría al límite.
+    """
+
+    def __init__(self, filename, max_age_seconds=0, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.max_age_seconds = max_age_seconds
+        self.opened_at = self._first_record_time(self.baseFilename) or time.time()
+
+    @staticmethod
+    def _first_record_time(filename):
+        """Hora del primer registro del archivo (None si está vacío o no existe)"""
+        try:
+            with open(filename, 'r', encoding='utf-8', errors='replace') as f:
+                first = f.readline()
+            if not first:
+                return None
+            try:
+                return time.mktime(time.strptime(first[:19], LOG_TIME_FORMAT))
+            except ValueError:
+                return os.path.getctime(filename)  # Primera línea ajena al formato
+        except OSError:
+            return None
+
+    def shouldRollover(self, record):
+        if self.max_age_seconds and time.time() - self.opened_at >= self.max_age_seconds:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.opened_at = time.time()
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler que no formatea en el hilo que loguea: lo hace el listener."""
+
+    def prepare(self, record):
+        return record
+
+class RateLimitFilter(logging.Filter):
+    """Limita los mensajes DEBUG/INFO repetidos (mismo template) por ventana de tiempo.
+
+    Pensado para el hot path (fallos de ping por host, ordenamientos): al abrir una
+    ventana nueva, el primer mensaje indica cuántos se descartaron en la anterior.
+    WARNING y superiores nunca se descartan.
+    """
+
+    def __init__(self, rate=LOG_DEFAULTS['rate_limit'], window=LOG_DEFAULTS['rate_window']):
+        super().__init__()
+        self.rate = rate
+        self.window = window
+        self.counters = {}  # (nivel, template) -> [inicio_ventana, emitidos, descartados]
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.rate <= 0:
+            return True
+        key = (record.levelno, record.msg)
+        now = time.monotonic()
+        with self.lock:
+            counter = self.counters.get(key)
+            if counter is None or now - counter[0] >= self.window:
+                dropped = counter[2] if counter else 0
+                self.counters[key] = [now, 1, 0]
+                if dropped:
+                    record.msg = f"{record.msg} [+{dropped} mensajes similares omitidos]"
+                return True
+            if counter[1] < self.rate:
+                counter[1] += 1
+                return True
+            counter[2] += 1
+            return False
+
+def setup_logging(options=None):
+    """Configura el pipeline de logging y devuelve el QueueListener ya iniciado."""
+    options = {**LOG_DEFAULTS, **(options or {})}
+    try:
+        log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
+        os.makedirs(log_dir, exist_ok=True)
+        log_file = os.path.join(log_dir, 'itool.log')
+    except Exception:
+        # Fallback al archivo en el cwd si no se puede crear la carpeta
+        log_file = 'itool.log'
+
+    file_handler = SizeAgeRotatingFileHandler(
+        log_file,
+        max_age_seconds=float(options['max_age_hours']) * 3600,
+        maxBytes=int(options['max_bytes']),
+        backupCount=int(options['backup_count']),
+        encoding='utf-8',
+        delay=True,
+    )
+    file_handler.setLevel(logging.DEBUG)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    # También mostrar logs en consola
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(logging.Formatter('%(levelname)s - %(message)s'))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(int(options['rate_limit']), float(options['rate_window'])))
+
+    root = logging.getLogger()
+    root.setLevel(logging.DEBUG)
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
 # --- Configuración Google Sheets ---
 SCOPE = ['https://spreadsheets.google.com/feeds',
          'https://www.googleapis.com/auth/drive']
+SHEET_NAME = 'bd_pcs'  # Cambia por el nombre de tu sheet
+DRIVE_FILES_URL = 'https://www.googleapis.com/drive/v3/files/%s'
 credential_path = os.path.join(BASE_DIR, 'credential.json')
-CREDS = ServiceAccountCredentials.from_json_keyfile_name(credential_path, SCOPE)
-gc = gspread.authorize(CREDS)
-sheet = gc.open('bd_pcs').sheet1  # Cambia por el nombre de tu sheet
 
 # --- Variables globales ---
 ssh_port = 49151
+# Columnas que usa iTool (obligatorias) y columnas opcionales por host
+INVENTORY_COLUMNS = ('titular', 'hostname', 'ip', 'usuario', 'contrasenia')
+INVENTORY_OPTIONAL_COLUMNS = ('puerto_ssh',)
+INVENTORY_CHUNK_SIZE = 500  # Registros por bloque al cargar el inventario en streaming
+INVENTORY_POLL_MS = 50      # Intervalo de sondeo de la cola de carga desde el hilo de Tk
+
+# --- Backends de inventario ---
+def normalize_record(row):
+    """Proyecta una fila cruda a las columnas de iTool. Devuelve None si está vacía."""
+    normalized = {}
+    for key, value in row.items():
+        if key is None:
+            continue
+        normalized[str(key).strip().lower()] = '' if value is None else str(value).strip()
+    record = {c: normalized.get(c, '') for c in INVENTORY_COLUMNS}
+    for c in INVENTORY_OPTIONAL_COLUMNS:
+        if normalized.get(c):
+            record[c] = normalized[c]
+    if not any(record.values()):
+        return None
+    return record
 
-# --- Optimización de la lectura de Google Sheets ---
-def get_pc_list():
-    try:
-        logging.info("Obteniendo datos de Google Sheets...")
-        data = sheet.get_all_records()
-        logging.info(f"Datos obtenidos: {len(data)} registros")
-        return data
-    except Exception as e:
-        logging.error(f"Error al leer Google Sheets: {e}")
-        print(f"Error al leer Google Sheets: {e}")
-        return []
+def _lower_key(text):
+    """Versión en minúsculas de `text`, reusando el mismo string si ya lo estaba"""
+    key = text.lower()
+    return text if key == text else sys.intern(key)
+
+class HostRecord:
+    """Registro compacto de un host, construido una sola vez por carga.
 
-# --- Validación de direcciones IP ---
-def is_valid_ip(ip):
+    Los textos se internan (titulares, usuarios y contraseñas se repiten mucho) y la
+    IP se parsea una vez: `ip_int` es el entero IPv4 (-1 si no es IPv4) y `ip_valid`
+    indica si es una IP válida (v4 o v6). `titular_key`/`hostname_key` son las
+    versiones en minúsculas para ordenar y filtrar (el mismo objeto que el original
+    si ya estaba en minúsculas) y `vlan_host_key` la clave del orden por IP.
+    """
+
+    __slots__ = (
+        'titular', 'hostname', 'ip', 'usuario', 'contrasenia', 'puerto_ssh',
+        'ip_int', 'ip_valid', 'titular_key', 'hostname_key', 'vlan_host_key',
+    )
+
+    def __init__(self, titular='', hostname='', ip='', usuario='', contrasenia='', puerto_ssh=''):
+        intern = sys.intern
+        self.titular = intern(titular)
+        self.hostname = intern(hostname)
+        self.ip = intern(ip)
+        self.usuario = intern(usuario)
+        self.contrasenia = intern(contrasenia)
+        try:
+            port = int(puerto_ssh)
+        except ValueError:
+            port = 0
+        self.puerto_ssh = port if 0 < port < 65536 else 0
+
+        try:
+            address = ipaddress.ip_address(ip)
+            self.ip_valid = True
+            self.ip_int = int(address) if address.version == 4 else -1
+        except ValueError:
+            self.ip_valid = False
+            self.ip_int = -1
+
+        # Clave VLAN (3er octeto) + host (4to octeto); IPs no IPv4 al final
+        self.vlan_host_key = self.ip_int & 0xFFFF if self.ip_int >= 0 else 0x10000
+        self.titular_key = _lower_key(self.titular)
+        self.hostname_key = _lower_key(self.hostname)
+
+    @classmethod
+    def from_record(cls, record):
+        """Crea el registro a partir de un dict ya normalizado (normalize_record)"""
+        return cls(**{k: record.get(k, '') for k in cls.FIELDS})
+
+    def __repr__(self):
+        return f"HostRecord(hostname={self.hostname!r}, ip={self.ip!r}, titular={self.titular!r})"
+
+HostRecord.FIELDS = INVENTORY_COLUMNS + INVENTORY_OPTIONAL_COLUMNS
+
+def _file_signature(path):
+    """Revisión barata de un archivo local: (mtime_ns, tamaño)."""
     try:
-        ipaddress.ip_address(ip)
-        return True
-    except ValueError:
-        return False
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
 
-# --- Clave de ordenamiento natural para IPs (IPv4) ---
-def ip_sort_key(value):
-    """Devuelve una tupla numérica para ordenar IPs de forma natural.
+class InventoryBackend(abc.ABC):
+    """Interfaz común de las fuentes de inventario.
 
-    - IPs válidas: (0, oct1, oct2, oct3, oct4)
-    - Vacías/Inválidas: (1, 0, 0, 0, 0)  -> van al final
+    Cada backend implementa `current_revision()` (chequeo barato de cambios) e
+    `_iter_rows()` (filas crudas como dicts). La clase base se encarga de normalizar,
+    construir los HostRecord, agrupar en bloques (`iter_chunks`) y recordar la última
+    revisión cargada.
     """
-    ip_str = str(value or '').strip()
-    parts = ip_str.split('.')
-    if len(parts) == 4:
-        try:
-            octs = [int(p) for p in parts]
-            if all(0 <= o <= 255 for o in octs):
-                return (0, octs[0], octs[1], octs[2], octs[3])
-        except Exception:
+
+    name = 'inventario'
+
+    def __init__(self):
+        self.revision = None
+        self.records = []
+        self.loaded = False
+
+    def describe(self):
+        return self.name
+
+    def current_revision(self):
+        return None
+
+    def check(self):
+        """Devuelve (cambió, revisión). Sin revisión conocida se asume que cambió."""
+        revision = self.current_revision()
+        unchanged = self.loaded and revision is not None and revision == self.revision
+        return not unchanged, revision
+
+    @abc.abstractmethod
+    def _iter_rows(self):
+        """Genera las filas crudas de la fuente como dicts columna -> valor"""
+
+    def iter_chunks(self, chunk_size=INVENTORY_CHUNK_SIZE, revision=None):
+        """Genera bloques de HostRecord a medida que se leen las filas."""
+        start = time.perf_counter()
+        records = []
+        chunk = []
+        for row in self._iter_rows():
+            record = normalize_record(row)
+            if record is None:
+                continue
+            chunk.append(HostRecord.from_record(record))
+            if len(chunk) >= chunk_size:
+                records.extend(chunk)
+                yield chunk
+                chunk = []
+        if chunk:
+            records.extend(chunk)
+            yield chunk
+        self.records = records
+        self.revision = revision
+        self.loaded = True
+        logging.info(
+            "Inventario cargado desde %s: %d registros en %.0f ms",
+            self.describe(), len(records), (time.perf_counter() - start) * 1000
+        )
+
+    def fetch(self):
+        """Devuelve (registros, cambió). Si la fuente no cambió no vuelve a leerla."""
+        changed, revision = self.check()
+        if not changed:
+            logging.info("%s sin cambios (revisión %s); se omite la lectura", self.describe(), revision)
+            return self.records, False
+        for _ in self.iter_chunks(revision=revision):
             pass
-    return (1, 0, 0, 0, 0)
+        return self.records, True
 
-def ip_last_octet_sort_key(value):
-    """Clave de ordenamiento por último octeto (host) para IPs IPv4.
+def get_spreadsheet_revision(book):
+    """Devuelve la revisión del spreadsheet (version de Drive o modifiedTime).
 
-    - IPs válidas: (0, last_octet)
-    - Vacías/Inválidas: (1, 0) -> al final
+    Es una consulta de metadatos muy liviana: no descarga celdas. Devuelve None si
+    no se puede determinar, en cuyo caso el llamador debe asumir que hubo cambios.
     """
-    ip_str = str(value or '').strip()
-    parts = ip_str.split('.')
-    if len(parts) == 4:
-        try:
-            last = int(parts[3])
-            if 0 <= last <= 255:
-                return (0, last)
-        except Exception:
-            pass
-    return (1, 0)
+    try:
+        client = getattr(book.client, 'http_client', book.client)  # gspread 6 / 5
+        response = client.request(
+            'get', DRIVE_FILES_URL % book.id,
+            params={'fields': 'version,modifiedTime', 'supportsAllDrives': True}
+        )
+        meta = response.json()
+        return meta.get('version') or meta.get('modifiedTime')
+    except Exception as e:
+        logging.debug("No se pudo obtener la revisión del spreadsheet: %s", e)
+        return None
+
+def _column_letter(index):
+    """Convierte un índice de columna 1-based a letras A1 (1 -> A, 27 -> AA)."""
+    letters = ''
+    while index > 0:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord('A') + rem) + letters
+    return letters
+
+class SheetsInventory(InventoryBackend):
+    """Lectura proyectada y con detección de cambios de la hoja de PCs.
+
+    - Antes de descargar, consulta la revisión del spreadsheet (`revision_fn`); si no
+      cambió desde la última lectura, devuelve los registros ya construidos.
+    - Sólo descarga las columnas que usa iTool (INVENTORY_COLUMNS + opcionales
+      presentes) en un único `batch_get`, en lugar de `get_all_records()`.
+
+    `worksheet` puede ser cualquier objeto con `row_values(1)` y `batch_get(ranges)`
+    (por ejemplo un stand-in local), y `revision_fn` cualquier callable sin argumentos.
+    Si no se pasa `worksheet`, se conecta a Google en el primer uso.
+    """
+
+    name = 'Google Sheets'
 
-def ip_vlan_host_sort_key(value):
-    """Clave de ordenamiento por VLAN (3er octeto) y host (4to octeto).
+    def __init__(self, worksheet=None, revision_fn=None, sheet_name=SHEET_NAME):
+        super().__init__()
+        self.worksheet = worksheet
+        self.revision_fn = revision_fn
+        self.sheet_name = sheet_name
+        self.last_bytes = 0
 
-    - IPs válidas: (0, vlan, host)
-    - Vacías/Inválidas: (1, 0, 0) -> al final
+    def describe(self):
+        return f"Google Sheets '{self.sheet_name}'"
+
+    def _connect(self):
+        if self.worksheet is not None:
+            return
+        # Import diferido: gspread y oauth2client sólo hacen falta con este backend
+        import gspread
+        from oauth2client.service_account import ServiceAccountCredentials
+        creds = ServiceAccountCredentials.from_json_keyfile_name(credential_path, SCOPE)
+        book = gspread.authorize(creds).open(self.sheet_name)
+        self.worksheet = book.sheet1
+        if self.revision_fn is None:
+            self.revision_fn = partial(get_spreadsheet_revision, book)
+
+    def current_revision(self):
+        self._connect()
+        return self.revision_fn() if self.revision_fn else None
+
+    def _iter_rows(self):
+        self._connect()
+        start = time.perf_counter()
+        header = [str(h).strip() for h in self.worksheet.row_values(1)]
+        wanted = [c for c in INVENTORY_COLUMNS + INVENTORY_OPTIONAL_COLUMNS if c in header]
+        missing = [c for c in INVENTORY_COLUMNS if c not in header]
+        if missing:
+            logging.warning("Columnas faltantes en la hoja: %s", ', '.join(missing))
+
+        ranges = []
+        for column in wanted:
+            letter = _column_letter(header.index(column) + 1)
+            ranges.append(f"{letter}2:{letter}")
+        columns = self.worksheet.batch_get(ranges) if ranges else []
+
+        values = []
+        for column_rows in columns:
+            values.append([row[0] if row else '' for row in column_rows])
+        row_count = max((len(v) for v in values), default=0)
+
+        # Estimación del payload recibido (JSON de los valores, sin cabeceras HTTP)
+        header_bytes = len(json.dumps(header, ensure_ascii=False).encode('utf-8'))
+        self.last_bytes = header_bytes + len(json.dumps(values, ensure_ascii=False).encode('utf-8'))
+        logging.info(
+            "Google Sheets: %d filas, %d columnas, ~%d bytes en %.0f ms",
+            row_count, len(wanted), self.last_bytes, (time.perf_counter() - start) * 1000
+        )
+
+        for i in range(row_count):
+            yield {
+                column: column_values[i] if i < len(column_values) else ''
+                for column, column_values in zip(wanted, values)
+            }
+
+class CsvInventory(InventoryBackend):
+    """Inventario desde un CSV exportado (separador `,`, `;` o tab autodetectado)."""
+
+    name = 'CSV'
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+
+    def describe(self):
+        return f"CSV '{self.path}'"
+
+    def current_revision(self):
+        return _file_signature(self.path)
+
+    def _iter_rows(self):
+        with open(self.path, 'r', newline='', encoding='utf-8-sig') as f:
+            sample = f.read(4096)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+            except csv.Error:
+                dialect = csv.excel
+            yield from csv.DictReader(f, dialect=dialect)
+
+class JsonInventory(InventoryBackend):
+    """Inventario desde JSON (array de objetos) o NDJSON (un objeto por línea).
+
+    El array se decodifica elemento a elemento con `raw_decode`, sin cargar el
+    documento completo como un único objeto Python.
     """
-    ip_str = str(value or '').strip()
-    parts = ip_str.split('.')
-    if len(parts) == 4:
+
+    name = 'JSON'
+    READ_SIZE = 64 * 1024
+
+    def __init__(self, path, ndjson=None):
+        super().__init__()
+        self.path = path
+        if ndjson is None:
+            ndjson = os.path.splitext(path)[1].lower() in ('.ndjson', '.jsonl')
+        self.ndjson = ndjson
+
+    def describe(self):
+        return f"{'NDJSON' if self.ndjson else 'JSON'} '{self.path}'"
+
+    def current_revision(self):
+        return _file_signature(self.path)
+
+    def _iter_rows(self):
+        with open(self.path, 'r', encoding='utf-8-sig') as f:
+            if self.ndjson:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        row = json.loads(line)
+                        if isinstance(row, dict):
+                            yield row
+            else:
+                yield from self._iter_array(f)
+
+    def _iter_array(self, f):
+        decoder = json.JSONDecoder()
+        buffer = f.read(self.READ_SIZE).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"{self.path}: se esperaba un array JSON de objetos")
+        pos = 1
+        eof = False
+        while True:
+            # Saltar espacios y separadores entre elementos
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == ']':
+                return
+            try:
+                row, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                more = f.read(self.READ_SIZE)
+                eof = not more
+                buffer = buffer[pos:] + more
+                pos = 0
+                continue
+            if isinstance(row, dict):
+                yield row
+            pos = end
+
+class SqliteInventory(InventoryBackend):
+    """Inventario desde una tabla SQLite (abierta en sólo lectura)."""
+
+    name = 'SQLite'
+
+    def __init__(self, path, table='pcs'):
+        super().__init__()
+        self.path = path
+        self.table = table
+
+    def describe(self):
+        return f"SQLite '{self.path}' (tabla {self.table})"
+
+    def current_revision(self):
+        return _file_signature(self.path)
+
+    def _iter_rows(self):
+        uri = 'file:' + os.path.abspath(self.path).replace('\\', '/') + '?mode=ro'
+        conn = sqlite3.connect(uri, uri=True)
         try:
-            vlan = int(parts[2])
-            host = int(parts[3])
-            if 0 <= vlan <= 255 and 0 <= host <= 255:
-                return (0, vlan, host)
-        except Exception:
-            pass
-    return (1, 0, 0)
+            table = '"' + self.table.replace('"', '""') + '"'
+            cursor = conn.execute(f'SELECT * FROM {table}')
+            names = [d[0] for d in cursor.description]
+            while True:
+                rows = cursor.fetchmany(INVENTORY_CHUNK_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(names, row))
+        finally:
+            conn.close()
+
+INVENTORY_BACKENDS = {
+    'sheets': SheetsInventory,
+    'csv': CsvInventory,
+    'json': JsonInventory,
+    'ndjson': partial(JsonInventory, ndjson=True),
+    'sqlite': SqliteInventory,
+}
+INVENTORY_EXTENSIONS = {
+    '.csv': 'csv', '.json': 'json', '.ndjson': 'ndjson', '.jsonl': 'ndjson',
+    '.db': 'sqlite', '.sqlite': 'sqlite', '.sqlite3': 'sqlite',
+}
+
+def create_inventory(spec=None, base_dir=APP_DIR):
+    """Crea el backend de inventario a partir de config/flag.
+
+    `spec` puede ser:
+    - None o 'sheets' -> Google Sheets (por defecto)
+    - 'csv:ruta', 'json:ruta', 'ndjson:ruta', 'sqlite:ruta[#tabla]'
+    - una ruta sola, detectando el tipo por extensión
+    - un dict {"backend": ..., "path": ..., "table": ..., "sheet_name": ...}
+
+    Las rutas relativas se resuelven contra `base_dir`: la carpeta de la aplicación
+    para config.json y el directorio actual para el flag --inventory.
+    """
+    if spec is None:
+        spec = {'backend': 'sheets'}
+    if isinstance(spec, str):
+        kind, sep, path = spec.partition(':')
+        kind = kind.lower()
+        if sep and kind in INVENTORY_BACKENDS:
+            spec = {'backend': kind, 'path': path}
+        else:
+            # Sin prefijo (o letra de unidad en Windows): detectar por extensión
+            spec = {'backend': 'sheets'} if kind == 'sheets' else {'backend': '', 'path': spec}
+        if spec['backend'] == 'sqlite' and '#' in spec['path']:
+            spec['path'], spec['table'] = spec['path'].rsplit('#', 1)
+
+    backend = (spec.get('backend') or '').lower()
+    path = spec.get('path') or ''
+    if not backend:
+        backend = INVENTORY_EXTENSIONS.get(os.path.splitext(path)[1].lower(), '')
+    if backend not in INVENTORY_BACKENDS:
+        raise ValueError(f"Backend de inventario desconocido: {spec!r}")
+
+    if backend == 'sheets':
+        return SheetsInventory(sheet_name=spec.get('sheet_name') or spec.get('path') or SHEET_NAME)
+    if not os.path.isabs(path):
+        path = os.path.join(base_dir, path)
+    if backend == 'sqlite':
+        return SqliteInventory(path, table=spec.get('table') or 'pcs')
+    return INVENTORY_BACKENDS[backend](path)
+
+_inventory = None
+
+def get_inventory():
+    """Backend de inventario activo (creado en el primer uso según config.json)."""
+    global _inventory
+    if _inventory is None:
+        _inventory = create_inventory(CONFIG.get('inventory'))
+    return _inventory
+
+def set_inventory(backend):
+    global _inventory
+    _inventory = backend
+
+def get_ssh_port(ip, pc=None):
+    """Puerto SSH de un host: columna opcional `puerto_ssh` o excepciones conocidas."""
+    if pc and pc.puerto_ssh:
+        return pc.puerto_ssh
+    if ip == "192.168.3.220" or ip == "192.168.3.143" or ip == "192.168.3.235":
+        return 22
+    if ip == "192.168.3.53":
+        return 16166
+    return ssh_port
+
+# --- Consultas del buscador (texto, calificadores y rangos de IP) ---
+FILTER_FIELDS = {
+    'titular': 'titular_key',
+    'host': 'hostname_key',
+    'hostname': 'hostname_key',
+    'ip': 'ip',
+}
+FILTER_TOKEN_RE = re.compile(r'(?:(\w+):)?(?:"([^"]*)"?|(\S+))')
+
+def parse_ipv4_range(text):
+    """Interpreta `text` como rango de IPv4 y devuelve (desde, hasta) o None.
+
+    Acepta CIDR (192.168.3.0/24), rangos (192.168.3.10-50 o 192.168.3.10-192.168.3.50),
+    prefijos terminados en punto (192.168.3. = toda la /24) e IPs completas (exacta).
+    """
+    try:
+        if '/' in text:
+            network = ipaddress.ip_network(text, strict=False)
+            if network.version != 4:
+                return None
+            return int(network.network_address), int(network.broadcast_address)
+        if '-' in text:
+            first, last = text.split('-', 1)
+            low = int(ipaddress.IPv4Address(first))
+            if '.' in last:
+                high = int(ipaddress.IPv4Address(last))
+            else:
+                end = int(last)
+                if not 0 <= end <= 255:
+                    return None
+                high = (low & ~0xFF) | end
+            return (low, high) if low <= high else (high, low)
+        if text.endswith('.'):
+            octets = text[:-1].split('.')
+            if not 1 <= len(octets) <= 3:
+                return None
+            values = [int(o) for o in octets]
+            if not all(0 <= v <= 255 for v in values):
+                return None
+            shift = 8 * (4 - len(values))
+            low = 0
+            for v in values:
+                low = (low << 8) | v
+            low <<= shift
+            return low, low | ((1 << shift) - 1)
+        address = int(ipaddress.IPv4Address(text))
+        return address, address
+    except ValueError:
+        return None
+
+class FilterQuery:
+    """Consulta del buscador ya parseada.
+
+    - Rangos de IP (CIDR, a-b, prefijo con punto, IP exacta): se combinan entre sí con
+      OR (`192.168.3.0/24 192.168.5.0/24` muestra ambas subredes).
+    - Texto libre y calificadores (`titular:`, `host:`, `ip:`): todos deben coincidir.
+    """
+
+    __slots__ = ('ranges', 'terms', 'fields')
+
+    def __init__(self, ranges=(), terms=(), fields=()):
+        self.ranges = list(ranges)   # [(desde, hasta)] sobre HostRecord.ip_int
+        self.terms = list(terms)     # subcadenas de hostname, ip o titular
+        self.fields = list(fields)   # [(atributo, subcadena)]
+
+    @classmethod
+    def parse(cls, text):
+        query = cls()
+        for field, quoted, bare in FILTER_TOKEN_RE.findall(text.lower()):
+            value = (quoted or bare).strip()
+            if not field and value.endswith(':') and value[:-1] in FILTER_FIELDS:
+                # Calificador todavía sin valor (`titular:` mientras se tipea): se ignora
+                continue
+            if field and field not in FILTER_FIELDS:
+                # No es un calificador conocido (p. ej. una IPv6): texto literal
+                value, field = f"{field}:{value}", ''
+            if not value:
+                continue
+            if not field or field == 'ip':
+                address_range = parse_ipv4_range(value)
+                if address_range is not None:
+                    query.ranges.append(address_range)
+                    continue
+            if field:
+                query.fields.append((FILTER_FIELDS[field], value))
+            else:
+                query.terms.append(value)
+        return query
+
+    def is_empty(self):
+        return not (self.ranges or self.terms or self.fields)
+
+    def matches(self, pc):
+        if self.ranges:
+            ip_int = pc.ip_int
+            if ip_int < 0 or not any(low <= ip_int <= high for low, high in self.ranges):
+                return False
+        for term in self.terms:
+            if term not in pc.hostname_key and term not in pc.ip and term not in pc.titular_key:
+                return False
+        for attr, term in self.fields:
+            if term not in getattr(pc, attr):
+                return False
+        return True
+
+class HostIndex:
+    """Índice de IPs ordenado para responder rangos con búsqueda binaria.
+
+    Guarda los `ip_int` IPv4 ordenados junto con la posición de cada host en la lista
+    original; un rango se resuelve con dos `bisect` en lugar de recorrer todo.
+    """
+
+    def __init__(self, records):
+        self.records = records
+        pairs = sorted((pc.ip_int, pos) for pos, pc in enumerate(records) if pc.ip_int >= 0)
+        self.keys = [key for key, _ in pairs]
+        self.positions = [pos for _, pos in pairs]
+
+    def lookup(self, low, high):
+        """Posiciones (en la lista original) de los hosts con IP en [low, high]"""
+        start = bisect.bisect_left(self.keys, low)
+        end = bisect.bisect_right(self.keys, high, lo=start)
+        return self.positions[start:end]
+
+    def search(self, query):
+        """Registros que cumplen `query`, en el orden de la lista original"""
+        if query.is_empty():
+            return list(self.records)
+        if not query.ranges:
+            return [pc for pc in self.records if query.matches(pc)]
+        positions = set()
+        for low, high in query.ranges:
+            positions.update(self.lookup(low, high))
+        records = self.records
+        if not (query.terms or query.fields):
+            return [records[pos] for pos in sorted(positions)]
+        return [records[pos] for pos in sorted(positions) if query.matches(records[pos])]
+
+# --- Timeouts adaptativos por subred (RTT) ---
+# Como TCP (RFC 6298): por cada /24 se mantiene un RTT suavizado (SRTT) y su
+# variación (RTTVAR), alimentados por los pings y conexiones TCP que responden
+# (aceptadas o rechazadas). El timeout es SRTT + 4·RTTVAR acotado a [piso, techo].
+# El techo, que es el timeout fijo de siempre, se sigue usando mientras la subred
+# no junta suficientes muestras y para todo host que todavía no se vio responder
+# ni se confirmó caído con un sondeo de duración completa.
+TIMEOUT_DEFAULTS = {
+    'adaptive': True,
+    'min': 0.25,          # Piso (s): margen para la latencia del propio event loop
+    'ping_max': 1.0,      # Techo y valor de warm-up del ping (s)
+    'port_max': 3.0,      # Techo y valor de warm-up de la conexión TCP (s)
+    'warmup_samples': 3,  # Muestras de la subred antes de adaptar
+}
+RTT_ALPHA = 1 / 8
+RTT_BETA = 1 / 4
+RTT_K = 4
+HOST_RTT_FACTOR = 2  # Un host que ya respondió nunca recibe menos que 2x su último RTT
+DOWN_RECHECK = 300   # Segundos tras los que un host caído vuelve a sondearse con el techo
+
+class SubnetRttEstimator:
+    """Estadísticas de RTT por subred y timeouts derivados de ellas.
+
+    Sólo los sondeos que responden aportan muestras: un host caído no agranda
+    ni achica el timeout de su subred. El timeout corto se aplica a los hosts
+    confirmados caídos (lo que acelera los barridos de segmentos mayormente
+    apagados) y a los que ya respondieron, con margen sobre su propio RTT; así un
+    host lento en una subred rápida no queda como falso negativo.
+    Seguro para usar desde varios hilos.
+    """
+
+    def __init__(self, options=None):
+        options = {**TIMEOUT_DEFAULTS, **(options or {})}
+        self.adaptive = bool(options['adaptive'])
+        self.floor = float(options['min'])
+        self.ceilings = {'ping': float(options['ping_max']), 'port': float(options['port_max'])}
+        self.warmup = int(options['warmup_samples'])
+        self.subnets = {}   # Subred -> [srtt, rttvar, muestras] (segundos)
+        self.host_rtt = {}  # IP -> último RTT (segundos) de los hosts vistos respondiendo
+        self.down_at = {}   # IP -> hora (monotonic) en que un sondeo completo no respondió
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def subnet_key(ip):
+        """/24 para IPv4; cualquier otra dirección se trata como su propia subred"""
+        return ip.rpartition('.')[0] or ip
+
+    def observe(self, ip, rtt):
+        """Registra un RTT medido (segundos) para `ip`"""
+        key = self.subnet_key(ip)
+        with self.lock:
+            self.host_rtt[ip] = rtt
+            self.down_at.pop(ip, None)
+            stats = self.subnets.get(key)
+            if stats is None:
+                self.subnets[key] = [rtt, rtt / 2, 1]
+                return
+            srtt, rttvar, samples = stats
+            stats[1] = (1 - RTT_BETA) * rttvar + RTT_BETA * abs(srtt - rtt)
+            stats[0] = (1 - RTT_ALPHA) * srtt + RTT_ALPHA * rtt
+            stats[2] = samples + 1
+
+    def timed_out(self, ip, timeout, kind='ping'):
+        """Registra un sondeo sin respuesta hecho con `timeout` segundos"""
+        with self.lock:
+            if kind == 'ping' and timeout < self.ceilings[kind]:
+                # Dejó de responder al ping con el timeout corto: confirmar con el techo
+                self.host_rtt.pop(ip, None)
+            elif timeout >= self.ceilings[kind] and ip not in self.host_rtt:
+                self.down_at[ip] = time.monotonic()
+
+    def timeout(self, ip, kind='ping'):
+        """Timeout (segundos) para un sondeo 'ping' o 'port' a `ip`"""
+        ceiling = self.ceilings[kind]
+        stats = self.subnets.get(self.subnet_key(ip))
+        if not self.adaptive or stats is None or stats[2] < self.warmup:
+            return ceiling
+        srtt, rttvar, _ = stats
+        rto = srtt + RTT_K * rttvar
+        host_rtt = self.host_rtt.get(ip)
+        if host_rtt is not None:
+            rto = max(rto, HOST_RTT_FACTOR * host_rtt)
+        else:
+            down_at = self.down_at.get(ip)
+            if down_at is None or time.monotonic() - down_at > DOWN_RECHECK:
+                return ceiling  # Host sin historia (o a reconfirmar): timeout completo
+        return min(max(rto, self.floor), ceiling)
+
+    def describe(self):
+        """Resumen para el log: subredes adaptadas y rango de timeouts de puerto"""
+        with self.lock:
+            ready = [s for s in self.subnets.values() if s[2] >= self.warmup]
+        if not ready:
+            return "sin subredes adaptadas"
+        timeouts = [min(max(s[0] + RTT_K * s[1], self.floor), self.ceilings['port']) for s in ready]
+        return f"{len(ready)} subredes adaptadas, timeout TCP {min(timeouts):.2f}-{max(timeouts):.2f} s"
+
+RTT_ESTIMATOR = SubnetRttEstimator((CONFIG.get('probe') or {}).get('timeouts'))
 
 # --- Ping asincrónico con manejo de PCs sin IP ---
-async def async_ping(ip):
+# Errores que son la respuesta normal de un host apagado o inalcanzable, no fallas del sondeo
+PROBE_EXPECTED_ERRNOS = frozenset(
+    getattr(errno, name) for name in
+    ('ECONNREFUSED', 'ECONNRESET', 'ETIMEDOUT', 'EHOSTUNREACH', 'ENETUNREACH', 'EHOSTDOWN', 'ENETDOWN')
+    if hasattr(errno, name)
+)
+
+class ProbeErrorCounter:
+    """Fallas reales de sondeo del proceso: sin descriptores, sin permisos, errores del executor.
+
+    Los timeouts y rechazos no cuentan (son resultados). Lo leen las métricas del
+    servicio y, en modo por shards, cada worker lo publica en el array compartido.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def record(self, error):
+        """Cuenta `error` si no es una respuesta esperada de la red; devuelve si contó"""
+        if isinstance(error, OSError) and error.errno in PROBE_EXPECTED_ERRNOS:
+            return False
+        with self.lock:
+            self.count += 1
+        return True
+
+PROBE_ERRORS = ProbeErrorCounter()
+
+_native_ping_supported = None
+
+def native_ping_available():
+    """Indica si el SO permite sockets ICMP sin privilegios (Linux/macOS)"""
+    global _native_ping_supported
+    if _native_ping_supported is None:
+        try:
+            socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP).close()
+            _native_ping_supported = True
+        except (OSError, AttributeError):
+            _native_ping_supported = False
+    return _native_ping_supported
+
+def _icmp_checksum(data):
+    if len(data) % 2:
+        data += b'\0'
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+def native_ping(ip, timeout=1.0):
+    """Echo ICMP con socket datagrama (sin privilegios). Devuelve el RTT en ms o None"""
+    seq = int.from_bytes(os.urandom(2), 'big')
+    payload = b'itool-ping'
+    header = struct.pack('!BBHHH', 8, 0, 0, 0, seq)
+    packet = struct.pack('!BBHHH', 8, 0, _icmp_checksum(header + payload), 0, seq) + payload
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP) as s:
+        started = time.perf_counter()
+        deadline = started + timeout
+        s.sendto(packet, (ip, 0))
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return None
+            s.settimeout(remaining)
+            try:
+                data, addr = s.recvfrom(1024)
+            except socket.timeout:
+                return None
+            if data and data[0] >> 4 == 4:
+                data = data[(data[0] & 0x0F) * 4:]  # macOS incluye el header IP
+            # Linux reescribe el identificador: validar tipo (echo reply) y secuencia
+            if addr[0] == ip and len(data) >= 8 and data[0] == 0 and struct.unpack('!H', data[6:8])[0] == seq:
+                return (time.perf_counter() - started) * 1000
+
+_pythonping = None
+
+def pythonping_ping(*args):
+    """pythonping.ping con import diferido (sólo si no hay ping nativo)"""
+    global _pythonping
+    if _pythonping is None:
+        from pythonping import ping as _pythonping
+    return _pythonping(*args)
+
+async def async_ping_rtt(ip, timeout=None):
+    """Ping asincrónico que devuelve el RTT en ms, o None si el host no responde.
+
+    `ip` ya viene validada (HostRecord.ip_valid / is_probeable). Sin `timeout`
+    explícito se usa el adaptativo de la subred (RTT_ESTIMATOR), que además aprende
+    de cada respuesta.
+    """
     if not ip:
-        return False
+        return None
 
-    if not is_valid_ip(ip):
-        return False
+    if timeout is None:
+        timeout = RTT_ESTIMATOR.timeout(ip, 'ping')
+    rtt_ms = await _ping_rtt(ip, timeout)
+    if rtt_ms is not None:
+        RTT_ESTIMATOR.observe(ip, rtt_ms / 1000)
+    else:
+        RTT_ESTIMATOR.timed_out(ip, timeout, 'ping')
+    return rtt_ms
 
+async def _ping_rtt(ip, timeout):
     loop = asyncio.get_event_loop()
     with ThreadPoolExecutor() as executor:
+        if '.' in ip and native_ping_available():
+            try:
+                return await loop.run_in_executor(executor, native_ping, ip, timeout)
+            except OSError as e:
+                if not PROBE_ERRORS.record(e):
+                    return None  # Red o host inalcanzable: no responde
+                logging.debug("Ping nativo falló para %s: %s", ip, e)
         try:
-            response = await loop.run_in_executor(executor, ping, ip, 1, 1)
-            return response.success()
+            response = await loop.run_in_executor(executor, pythonping_ping, ip, timeout, 1)
+            return response.rtt_avg_ms if response.success() else None
         except Exception as e:
-            logging.debug(f"Error al hacer ping a {ip}: {e}")
+            logging.debug("Error al hacer ping a %s: %s", ip, e)
             # Fallback en Linux sin privilegios para usar comando del sistema
-            if platform.system().lower() == 'linux':
+            if platform.system().lower() != 'linux':
+                PROBE_ERRORS.record(e)
+            else:
                 try:
+                    started = time.perf_counter()
                     proc = await loop.run_in_executor(
                         executor,
                         lambda: subprocess.run([
-                            'ping', '-c', '1', '-W', '1', ip
+                            'ping', '-c', '1', '-W', str(max(1, math.ceil(timeout))), ip
                         ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
                     )
-                    return proc.returncode == 0
+                    if proc.returncode == 0:
+                        return (time.perf_counter() - started) * 1000
                 except Exception as e2:
-                    logging.debug(f"Fallback ping fallo para {ip}: {e2}")
-            return False
+                    PROBE_ERRORS.record(e2)
+                    logging.debug("Fallback ping fallo para %s: %s", ip, e2)
+            return None
 
-async def update_leds_async(leds, app_instance):
-    if not leds:
+async def async_ping(ip):
+    return await async_ping_rtt(ip) is not None
+
+def apply_led_state(led, online):
+    """Pinta el LED de ping según el resultado"""
+    led.config(fg="green" if online else "red")
+
+def apply_ssh_state(button, port_open):
+    """Habilita/deshabilita un botón SSH según el puerto"""
+    if port_open:
+        button.config(state="normal", text="SSH")
+    else:
+        button.config(state="disabled", text="✗")
+
+def apply_rdp_state(button, port_open, label="RDP"):
+    """Habilita/deshabilita un botón RDP o Mirroring según el puerto 3389"""
+    # Solo habilitar si el puerto está abierto; si no, mostrar ✗
+    if port_open:
+        button.config(state="normal", text=label)
+    else:
+        button.config(state="disabled", text="✗")
+
+# Widgets de una fila afectados por cada tipo de resultado de sondeo
+PROBE_RESULT_WIDGETS = {
+    'ping': ('led',),
+    'ssh': ('ssh',),
+    'rdp': ('rdp', 'mirror'),
+}
+WIDGET_APPLIERS = {
+    'led': apply_led_state,
+    'ssh': apply_ssh_state,
+    'rdp': partial(apply_rdp_state, label="RDP"),
+    'mirror': partial(apply_rdp_state, label="Mirroring"),
+}
+GROUP_HEADER_BG = '#dde6f0'  # Fondo de los encabezados de VLAN
+GROUP_HEADER_REFRESH = 1.0   # Segundos mínimos entre recálculos de contadores por VLAN
+GROUP_SAMPLE_SIZE = 32       # IPs de grupos colapsados sondeadas por ciclo de LEDs
+UI_FRAME_MS = 16          # Intervalo de vaciado de la cola de resultados (~1 frame)
+UI_BATCH_BUDGET = 0.008   # Segundos máximos de trabajo por tick en el hilo de Tk
+
+# --- Layout de columnas del grid ---
+GRID_HEADERS = ("Titular", "Host", "IP", "Ping", "Mirroring", "RDP", "SSH")
+GRID_SORT_KEYS = ("titular", "hostname", "ip", "", "", "", "")  # Columnas ordenables
+GRID_HEADER_FONT = ("Arial", 10, "bold")
+GRID_LED_FONT = ("Arial", 12)
+GRID_CELL_PADX = 2  # padx de grid de cada celda, igual en headers y filas
+GRID_MAX_ROWS = 9000  # Filas dibujadas como máximo (Tk no admite filas >= 10000)
+# Textos que puede mostrar cada columna fija (LED y botones, según su estado)
+GRID_FIXED_TEXTS = {
+    3: ('●',),
+    4: ('Mirroring', 'N/A', '✗'),
+    5: ('RDP', 'N/A', '✗'),
+    6: ('SSH', '✗'),
+}
+
+class ColumnLayout:
+    """Anchos de las columnas del grid medidos con las fuentes reales de Tk.
+
+    - Titular, Host e IP guardan el máximo del inventario cargado (no del filtrado,
+      para que las columnas no salten al filtrar) y se actualizan sólo con los
+      registros que se agregan. Cada string se mide con `font.measure` una única
+      vez, y sólo si la suma de los anchos de sus caracteres (memoizados) supera
+      el máximo actual: el resto no puede ensancharlo.
+    - Ping y botones se miden una vez, con el ancho pedido por el widget real
+      para cada texto que pueden mostrar.
+    `widths()` incluye el padding de grid y es el mismo para headers y filas, de
+    modo que ambos grids quedan alineados sin consultar la geometría dibujada.
+    """
+
+    def __init__(self, frame, headers_frame):
+        self.font = tkfont.nametofont('TkDefaultFont')  # Fuente de los Label de las filas
+        self.char_widths = {}
+        self.text_widths = {}
+        self.cell_chrome = self._chrome(tk.Label(frame, anchor='w'), self.font)
+        header_font = tkfont.Font(font=GRID_HEADER_FONT)
+        header_chrome = self._chrome(
+            tk.Label(headers_frame, font=GRID_HEADER_FONT, relief='raised', bd=1, anchor='w'), header_font
+        )
+        self.base = []
+        for col, (header, key) in enumerate(zip(GRID_HEADERS, GRID_SORT_KEYS)):
+            variants = (header, header + " ↓", header + " ↑") if key else (header,)
+            width = max(header_font.measure(text) for text in variants) + header_chrome
+            for text in GRID_FIXED_TEXTS.get(col, ()):
+                width = max(width, self._reqwidth(frame, col, text))
+            self.base.append(width)
+        self.maxima = [0, 0, 0]
+
+    @staticmethod
+    def _chrome(widget, font):
+        """Ancho que agrega el widget (bordes y padding interno) alrededor del texto"""
+        widget.config(text='M')
+        chrome = widget.winfo_reqwidth() - font.measure('M')
+        widget.destroy()
+        return chrome
+
+    @staticmethod
+    def _reqwidth(frame, col, text):
+        if col == 3:
+            widget = tk.Label(frame, text=text, font=GRID_LED_FONT)
+        else:
+            widget = tk.Button(frame, text=text)
+        width = widget.winfo_reqwidth()
+        widget.destroy()
+        return width
+
+    def reset(self):
+        self.maxima = [0, 0, 0]
+
+    def _upper_bound(self, text):
+        """Suma de los avances de cada caracter: en la práctica, cota superior del ancho"""
+        widths = self.char_widths
+        total = 0
+        for ch in text:
+            width = widths.get(ch)
+            if width is None:
+                width = widths[ch] = self.font.measure(ch)
+            total += width
+        return total
+
+    def _measure(self, text):
+        width = self.text_widths.get(text)
+        if width is None:
+            width = self.text_widths[text] = self.font.measure(text)
+        return width
+
+    def add_rows(self, records):
+        """Actualiza los máximos con nuevos registros; devuelve True si alguno creció"""
+        grew = False
+        for col, field in enumerate(('titular', 'hostname', 'ip')):
+            current = self.maxima[col]
+            for text in {getattr(pc, field) for pc in records}:
+                if self._upper_bound(text) > current:
+                    current = max(current, self._measure(text))
+            if current > self.maxima[col]:
+                self.maxima[col] = current
+                grew = True
+        return grew
+
+    def widths(self):
+        """Ancho en píxeles de cada columna, incluido el padding de grid"""
+        widths = list(self.base)
+        for col, width in enumerate(self.maxima):
+            if width:
+                widths[col] = max(widths[col], width + self.cell_chrome)
+        return [width + 2 * GRID_CELL_PADX for width in widths]
+
+async def update_leds_async(ips, app_instance):
+    """Hace ping a las IPs (o usa el cache) y encola los resultados para la UI."""
+    if not ips:
         return
 
+    async def check(ip):
+        result = await async_ping(ip)
+        app_instance.ping_cache[ip] = result
+        app_instance.update_cache_timestamp(ip)
+        app_instance.post_probe_result('ping', ip, result)
+
     # Separar IPs que necesitan ping de las que ya están en cache
     tasks = []
-    cached_results = []
-
-    for led, ip in leds:
-        if not ip:
-            cached_results.append((led, False))
+    for ip in ips:
+        if not app_instance.is_probeable(ip):
+            app_instance.post_probe_result('ping', ip, False)
         elif app_instance.is_cache_valid(ip) and ip in app_instance.ping_cache:
             # Usar resultado del cache
-            cached_results.append((led, app_instance.ping_cache[ip]))
+            app_instance.post_probe_result('ping', ip, app_instance.ping_cache[ip])
         else:
             # Necesita ping
-            tasks.append((led, ip, async_ping(ip)))
+            tasks.append(check(ip))
 
-    # Ejecutar solo los pings necesarios
+    # Ejecutar solo los pings necesarios; cada resultado se encola al llegar
     if tasks:
-        ping_results = await asyncio.gather(*[task[2] for task in tasks])
-        for (led, ip, _), result in zip(tasks, ping_results):
-            app_instance.ping_cache[ip] = result
-            app_instance.update_cache_timestamp(ip)
-            cached_results.append((led, result))
-
-    # Aplicar todos los resultados
-    for led, online in cached_results:
-        if not led.winfo_exists():  # Verificar que el widget aún existe
-            continue
-        led.config(fg="green" if online else "red")
+        await asyncio.gather(*tasks)
 
-async def async_is_port_open(ip, port):
-    """Verifica asincrónicamente si un puerto específico está abierto en una IP dada."""
-    if not ip or not is_valid_ip(ip):
-        return False
+async def async_is_port_open(ip, port, timeout=None):
+    """Verifica asincrónicamente si un puerto específico está abierto en una IP dada.
 
-    def check_port():
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.settimeout(3)
-                result = s.connect_ex((ip, port))
-                return result == 0
-        except Exception:
-            return False
+    `ip` ya viene validada (HostRecord.ip_valid / is_probeable). Sin `timeout`
+    explícito se usa el adaptativo de la subred; el tiempo de cada conexión aceptada
+    o rechazada (un RTT: SYN / SYN-ACK o RST) alimenta al estimador.
+    """
+    if not ip:
+        return False
 
-    loop = asyncio.get_event_loop()
-    with ThreadPoolExecutor() as executor:
-        try:
-            result = await loop.run_in_executor(executor, check_port)
-            return result
-        except Exception as e:
-            logging.debug(f"Error al verificar el puerto {port} en {ip}: {e}")
-            return False
+    if timeout is None:
+        timeout = RTT_ESTIMATOR.timeout(ip, 'port')
+    started = time.perf_counter()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+    except ConnectionRefusedError:
+        RTT_ESTIMATOR.observe(ip, time.perf_counter() - started)  # El host respondió con RST
+        return False
+    except asyncio.TimeoutError:
+        RTT_ESTIMATOR.timed_out(ip, timeout, 'port')
+        return False
+    except Exception as e:
+        if PROBE_ERRORS.record(e):
+            logging.debug("Error al verificar el puerto %s en %s: %s", port, ip, e)
+        return False
+    RTT_ESTIMATOR.observe(ip, time.perf_counter() - started)
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except Exception:
+        pass
+    return True
 
-async def update_ssh_buttons_async(buttons, app_instance):
-    """Actualiza los botones SSH según la disponibilidad del puerto."""
-    if not buttons:
+async def update_ssh_buttons_async(ips, app_instance):
+    """Verifica el puerto SSH de las IPs y encola los resultados para la UI."""
+    if not ips:
         return
 
-    # Separar botones que necesitan verificación de los que están en cache
-    tasks = []
-    cached_results = []
+    async def check(ip):
+        current_ssh_port = get_ssh_port(ip, app_instance.hosts_by_ip.get(ip))
+        result = await async_is_port_open(ip, current_ssh_port)
+        app_instance.ssh_port_cache[ip] = result
+        app_instance.update_cache_timestamp(ip)
+        app_instance.post_probe_result('ssh', ip, result)
 
-    for button, ip in buttons:
-        if not ip:
-            cached_results.append((button, False))
+    # Separar IPs que necesitan verificación de las que están en cache
+    tasks = []
+    for ip in ips:
+        if not app_instance.is_probeable(ip):
+            app_instance.post_probe_result('ssh', ip, False)
         elif app_instance.is_cache_valid(ip) and ip in app_instance.ssh_port_cache:
             # Usar resultado del cache
-            cached_results.append((button, app_instance.ssh_port_cache[ip]))
+            app_instance.post_probe_result('ssh', ip, app_instance.ssh_port_cache[ip])
         else:
-            if ip == "192.168.3.220" or ip == "192.168.3.143" or ip == "192.168.3.235":
-                current_ssh_port = 22
-            elif ip == "192.168.3.53":
-                current_ssh_port = 16166
-            else:
-                current_ssh_port = ssh_port
-            tasks.append((button, ip, async_is_port_open(ip, current_ssh_port)))
+            tasks.append(check(ip))
 
     # Ejecutar solo las verificaciones necesarias
     if tasks:
-        port_results = await asyncio.gather(*[task[2] for task in tasks])
-        for (button, ip, _), result in zip(tasks, port_results):
-            app_instance.ssh_port_cache[ip] = result
-            app_instance.update_cache_timestamp(ip)
-            cached_results.append((button, result))
-
-    # Aplicar todos los resultados
-    for button, port_open in cached_results:
-        if not button.winfo_exists():  # Verificar que el widget aún existe
-            continue
-        if port_open:
-            button.config(state="normal", text="SSH")
-        else:
-            button.config(state="disabled", text="✗")
+        await asyncio.gather(*tasks)
 
-async def update_rdp_buttons_async(buttons, app_instance):
-    """Actualiza los botones RDP según la disponibilidad del puerto 3389."""
-    if not buttons:
+async def update_rdp_buttons_async(ips, app_instance):
+    """Verifica el puerto 3389 de las IPs y encola los resultados para la UI."""
+    if not ips:
         return
 
-    # Separar botones que necesitan verificación de los que están en cache
-    tasks = []
-    cached_results = []
+    async def check(ip):
+        result = await async_is_port_open(ip, 3389)
+        app_instance.rdp_port_cache[ip] = result
+        app_instance.update_cache_timestamp(ip)
+        app_instance.post_probe_result('rdp', ip, result)
 
-    for button, ip in buttons:
-        if not ip:
-            cached_results.append((button, False))
+    # Separar IPs que necesitan verificación de las que están en cache
+    tasks = []
+    for ip in ips:
+        if not app_instance.is_probeable(ip):
+            app_instance.post_probe_result('rdp', ip, False)
         elif app_instance.is_cache_valid(ip) and ip in app_instance.rdp_port_cache:
             # Usar resultado del cache
-            cached_results.append((button, app_instance.rdp_port_cache[ip]))
+            app_instance.post_probe_result('rdp', ip, app_instance.rdp_port_cache[ip])
         else:
             # Necesita verificación
-            tasks.append((button, ip, async_is_port_open(ip, 3389)))
+            tasks.append(check(ip))
 
     # Ejecutar solo las verificaciones necesarias
     if tasks:
-        port_results = await asyncio.gather(*[task[2] for task in tasks])
-        for (button, ip, _), result in zip(tasks, port_results):
-            app_instance.rdp_port_cache[ip] = result
-            app_instance.update_cache_timestamp(ip)
-            cached_results.append((button, result))
-
-    # Aplicar todos los resultados
-    for button, port_open in cached_results:
-        if not button.winfo_exists():  # Verificar que el widget aún existe
+        await asyncio.gather(*tasks)
+
+async def probe_ips_async(ips, app_instance):
+    """Ping y puertos SSH/RDP de `ips` (respetando el cache), en paralelo."""
+    await asyncio.gather(
+        update_leds_async(ips, app_instance),
+        update_ssh_buttons_async(ips, app_instance),
+        update_rdp_buttons_async(ips, app_instance),
+    )
+
+# --- Sondeo multiproceso por shards ---
+# Cada host del inventario tiene un registro de tamaño fijo en un array de memoria
+# compartida. Los workers escriben con un seqlock (secuencia impar = escritura en
+# curso) y la UI lee los registros directamente, sin mensajes por resultado.
+PROBE_DEFAULTS = {
+    'workers': 0,               # 0 = sondeo en el proceso de la UI (modo clásico)
+    'shard_strategy': 'subnet', # 'subnet' (/24 completas por worker) o 'round_robin'
+    'interval': 10,             # Segundos entre barridos de cada worker
+    'concurrency': 256,         # Sondeos simultáneos por worker
+    'service': '',              # URL de un servicio de sondeo compartido (vacío = sondear localmente)
+}
+SHARD_STRATEGIES = ('subnet', 'round_robin')
+PROBER_POLL_MS = 1000  # Cada cuánto la UI lee el array de estados
+
+STATUS_SEQ = struct.Struct('<I')
+STATUS_BODY = struct.Struct('<BBBxfd')  # online, ssh, rdp, pad, rtt_ms, checked_at
+STATUS_RECORD_SIZE = STATUS_SEQ.size + STATUS_BODY.size
+# Después de los hosts, un registro por worker con sus barridos: cantidad, errores, duración
+SHARD_BODY = struct.Struct('<IId')
+SHARD_RECORD_SIZE = STATUS_SEQ.size + SHARD_BODY.size
+
+ProbeStatus = namedtuple('ProbeStatus', 'online ssh_open rdp_open rtt_ms checked_at')
+ShardStats = namedtuple('ShardStats', 'sweeps errors last_sweep')
+
+def _seqlock_write(view, offset, body, *values):
+    seq = STATUS_SEQ.unpack_from(view, offset)[0]
+    STATUS_SEQ.pack_into(view, offset, (seq + 1) & 0xFFFFFFFF)
+    body.pack_into(view, offset + STATUS_SEQ.size, *values)
+    STATUS_SEQ.pack_into(view, offset, (seq + 2) & 0xFFFFFFFF)
+
+def _seqlock_read(view, offset, body):
+    """Lee un registro consistente (reintenta si el worker lo está escribiendo); None si no se pudo"""
+    for _ in range(100):
+        seq = STATUS_SEQ.unpack_from(view, offset)[0]
+        if seq & 1:
             continue
-        # Solo habilitar si el puerto está abierto
-        if port_open:
-            button.config(state="normal")
-            # Restaurar texto original según el botón
-            if "Mirroring" in button.cget('text') or button.cget('text') == "✗":
-                button.config(text="Mirroring")
-            elif "RDP" in button.cget('text') or button.cget('text') == "✗":
-                button.config(text="RDP")
+        values = body.unpack_from(view, offset + STATUS_SEQ.size)
+        if STATUS_SEQ.unpack_from(view, offset)[0] == seq:
+            return values
+    return None
+
+def write_probe_status(view, index, online, ssh_open, rdp_open, rtt_ms, checked_at):
+    """Escribe el registro `index` del array compartido (sólo lo llama su worker)."""
+    _seqlock_write(
+        view, index * STATUS_RECORD_SIZE, STATUS_BODY, bool(online), bool(ssh_open), bool(rdp_open),
+        float('nan') if rtt_ms is None else rtt_ms, checked_at
+    )
+
+def read_probe_status(view, index):
+    """Lee el registro `index`; None si el host todavía no fue sondeado."""
+    body = _seqlock_read(view, index * STATUS_RECORD_SIZE, STATUS_BODY)
+    if body is None:
+        return None
+    online, ssh_open, rdp_open, rtt_ms, checked_at = body
+    if not checked_at:
+        return None
+    return ProbeStatus(
+        bool(online), bool(ssh_open), bool(rdp_open),
+        None if math.isnan(rtt_ms) else rtt_ms, checked_at
+    )
+
+def shard_hosts(records, workers, strategy='subnet'):
+    """Reparte los índices de `records` (HostRecord) en `workers` listas.
+
+    - 'round_robin': índice i -> worker i % N (reparto parejo).
+    - 'subnet': cada /24 va entera a un mismo worker, asignando las subredes más
+      grandes primero al worker menos cargado.
+    Los hosts sin IPv4 válida (`ip_int` < 0) no se asignan a ningún worker.
+    """
+    if strategy not in SHARD_STRATEGIES:
+        raise ValueError(f"Estrategia de shard desconocida: {strategy!r}")
+    workers = max(1, workers)
+    shards = [[] for _ in range(workers)]
+    valid = [i for i, pc in enumerate(records) if pc.ip_int >= 0]
+    if strategy == 'round_robin':
+        for n, index in enumerate(valid):
+            shards[n % workers].append(index)
+        return shards
+
+    subnets = {}
+    for index in valid:
+        subnets.setdefault(records[index].ip_int >> 8, []).append(index)
+    loads = [(0, w) for w in range(workers)]
+    heapq.heapify(loads)
+    for members in sorted(subnets.values(), key=len, reverse=True):
+        load, w = heapq.heappop(loads)
+        shards[w].extend(members)
+        heapq.heappush(loads, (load + len(members), w))
+    return shards
+
+async def probe_host(ip, port_ssh, probe_ping=True):
+    """Sondea un host completo: ping (con RTT), puerto SSH y puerto RDP"""
+    ping_task = async_ping_rtt(ip) if probe_ping else asyncio.sleep(0)
+    rtt_ms, ssh_open, rdp_open = await asyncio.gather(
+        ping_task, async_is_port_open(ip, port_ssh), async_is_port_open(ip, 3389)
+    )
+    online = rtt_ms is not None if probe_ping else (ssh_open or rdp_open)
+    return online, ssh_open, rdp_open, rtt_ms
+
+async def _probe_shard_loop(status, shard, stats_offset, interval, concurrency, probe_ping, stop_event):
+    view = memoryview(status).cast('B')
+    semaphore = asyncio.Semaphore(concurrency)
+    sweeps = 0
+
+    async def probe(index, ip, port_ssh):
+        try:
+            async with semaphore:
+                online, ssh_open, rdp_open, rtt_ms = await probe_host(ip, port_ssh, probe_ping)
+        except Exception as e:
+            PROBE_ERRORS.record(e)
+            logging.debug("Worker de sondeo: error al sondear %s: %s", ip, e)
+            return
+        write_probe_status(view, index, online, ssh_open, rdp_open, rtt_ms, time.time())
+
+    while not stop_event.is_set():
+        started = time.monotonic()
+        sweep = asyncio.ensure_future(asyncio.gather(*(probe(*host) for host in shard)))
+        # El evento se revisa también durante el barrido: con cientos de hosts
+        # apagados un barrido puede durar varios timeouts y stop() no debe esperarlo
+        while not sweep.done():
+            if stop_event.is_set():
+                sweep.cancel()
+                return
+            await asyncio.wait((sweep,), timeout=0.2)
+        sweeps += 1
+        _seqlock_write(view, stats_offset, SHARD_BODY, sweeps, PROBE_ERRORS.count, time.monotonic() - started)
+        while not stop_event.is_set() and time.monotonic() - started < interval:
+            await asyncio.sleep(0.2)
+
+def _probe_shard_main(status, shard, stats_offset, interval, concurrency, probe_ping, stop_event):
+    """Punto de entrada de cada proceso worker: sondea su shard hasta que se pida parar"""
+    try:
+        asyncio.run(_probe_shard_loop(status, shard, stats_offset, interval, concurrency, probe_ping, stop_event))
+    except KeyboardInterrupt:
+        pass
+
+class ShardedProber:
+    """Reparte el sondeo del inventario entre N procesos worker.
+
+    Uso: `start(records)` con una lista de HostRecord sin IPs repetidas, luego
+    `status(ip)` desde la UI; `stop()` termina los workers. `shard_stats()` da los
+    barridos, errores y duración del último barrido de cada worker.
+    """
+
+    def __init__(self, workers, strategy='subnet', interval=10, concurrency=256, probe_ping=True):
+        self.workers = max(1, int(workers))
+        self.strategy = strategy
+        self.interval = interval
+        self.concurrency = concurrency
+        self.probe_ping = probe_ping
+        self.context = multiprocessing.get_context('spawn')  # Tk no sobrevive a fork
+        self.processes = []
+        self.stop_event = None
+        self.status_array = None
+        self.view = None
+        self.index_of = {}
+        self.stats_offsets = []  # Posición del registro de barridos de cada worker lanzado
+
+    def start(self, records):
+        self.stop()
+        self.index_of = {pc.ip: i for i, pc in enumerate(records)}
+        hosts_size = max(1, len(records)) * STATUS_RECORD_SIZE
+        self.status_array = self.context.RawArray('B', hosts_size + self.workers * SHARD_RECORD_SIZE)
+        self.view = memoryview(self.status_array).cast('B')
+        self.stop_event = self.context.Event()
+        self.stats_offsets = []
+        shards = shard_hosts(records, self.workers, self.strategy)
+        for n, indices in enumerate(shards):
+            if not indices:
+                continue
+            shard = [(i, records[i].ip, get_ssh_port(records[i].ip, records[i])) for i in indices]
+            stats_offset = hosts_size + n * SHARD_RECORD_SIZE
+            process = self.context.Process(
+                target=_probe_shard_main, name=f"itool-probe-{n}", daemon=True,
+                args=(self.status_array, shard, stats_offset, self.interval, self.concurrency,
+                      self.probe_ping, self.stop_event)
+            )
+            process.start()
+            self.processes.append(process)
+            self.stats_offsets.append(stats_offset)
+        logging.info(
+            "Sondeo por shards: %d hosts en %d workers (%s)",
+            len(records), len(self.processes), self.strategy
+        )
+
+    def stop(self):
+        """Pide a los workers que terminen sin bloquear al llamador (el hilo de Tk)."""
+        if self.stop_event is not None:
+            self.stop_event.set()
+        if self.processes:
+            threading.Thread(
+                target=self._reap, args=(self.processes,), name="itool-probe-reaper", daemon=True
+            ).start()
+        self.processes = []
+
+    @staticmethod
+    def _reap(processes):
+        """Espera a los workers detenidos y mata a los que no terminaron a tiempo"""
+        deadline = time.monotonic() + 2
+        for process in processes:
+            process.join(timeout=max(0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=1)
+
+    def status(self, ip):
+        index = self.index_of.get(ip)
+        if index is None or self.view is None:
+            return None
+        return read_probe_status(self.view, index)
+
+    def status_at(self, index):
+        return read_probe_status(self.view, index)
+
+    def shard_stats(self):
+        """ShardStats de cada worker lanzado (barridos completos, errores, duración del último)"""
+        stats = []
+        for offset in self.stats_offsets:
+            values = _seqlock_read(self.view, offset, SHARD_BODY)
+            stats.append(ShardStats(*values) if values else ShardStats(0, 0, 0.0))
+        return stats
+
+    def poll(self):
+        """Devuelve (ip, ProbeStatus) de todos los hosts ya sondeados"""
+        return [
+            (ip, status) for ip, status in
+            ((ip, read_probe_status(self.view, index)) for ip, index in self.index_of.items())
+            if status is not None
+        ]
+
+# --- Servicio de sondeo compartido ---
+# Un único daemon (`--serve-probes`) barre el inventario y publica el estado por
+# HTTP/JSON; las instancias de iTool configuradas con probe.service se suscriben a
+# los cambios (long poll) en lugar de sondear cada una la red por su cuenta.
+SERVICE_LISTEN = '127.0.0.1:8765'  # Sólo loopback salvo que se indique otra interfaz
+SERVICE_LONG_POLL = 25     # Segundos máximos que el servicio retiene un /changes
+SERVICE_COALESCE = 0.25    # Espera tras el primer cambio para agrupar los de un barrido
+SERVICE_RELOAD = 300       # Segundos entre chequeos de cambios del inventario
+SERVICE_RETRY_MAX = 30     # Segundos máximos entre reintentos del cliente
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+HOST_METRICS = (
+    # (nombre, ayuda, campo de ProbeStatus)
+    ('itool_host_up', "1 si el host responde al ping (o a SSH/RDP sin ping)", 'online'),
+    ('itool_host_ssh_open', "1 si el puerto SSH del host está abierto", 'ssh_open'),
+    ('itool_host_rdp_open', "1 si el puerto RDP (3389) del host está abierto", 'rdp_open'),
+)
+
+def parse_listen_address(text):
+    """'host:puerto', ':puerto' o 'puerto' -> (host, puerto); host por defecto loopback."""
+    host, _, port = str(text).rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+class ProbeStateStore:
+    """Estado publicado por el servicio: ip -> (secuencia del último cambio, ProbeStatus).
+
+    Sólo cuentan como cambio online/ssh/rdp; el RTT y la hora del sondeo se
+    actualizan sin avanzar la secuencia. `epoch` identifica la instancia del
+    servicio para que los clientes detecten un reinicio.
+    """
+
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex[:12]
+        self.seq = 0
+        self.hosts = {}
+        self.cond = threading.Condition()
+
+    def update(self, ip, status):
+        with self.cond:
+            previous = self.hosts.get(ip)
+            if previous and previous[1][:3] == status[:3]:
+                self.hosts[ip] = (previous[0], status)
+                return
+            self.seq += 1
+            self.hosts[ip] = (self.seq, status)
+            self.cond.notify_all()
+
+    def retain(self, ips):
+        """Olvida los hosts que ya no están en el inventario"""
+        with self.cond:
+            for ip in set(self.hosts) - set(ips):
+                del self.hosts[ip]
+
+    def payload(self, since=0, full=False):
+        with self.cond:
+            return {
+                'epoch': self.epoch, 'seq': self.seq, 'full': full,
+                'hosts': {ip: list(status) for ip, (seq, status) in self.hosts.items() if seq > since},
+            }
+
+    def changes_since(self, since, epoch, timeout=SERVICE_LONG_POLL):
+        """Espera cambios posteriores a `since`; con otra época devuelve el estado completo."""
+        with self.cond:
+            stale = epoch != self.epoch or since > self.seq
+            if not stale and not self.cond.wait_for(lambda: self.seq > since, timeout):
+                return self.payload(since)
+        if stale:
+            return self.payload(full=True)
+        time.sleep(SERVICE_COALESCE)
+        return self.payload(since)
+
+def _metric_label(value):
+    """Escapa un valor de etiqueta del formato de exposición de Prometheus"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _make_service_handler(service):
+    from http.server import BaseHTTPRequestHandler
+    from urllib.parse import urlsplit, parse_qs
+
+    class ProbeServiceHandler(BaseHTTPRequestHandler):
+        """GET /status, /changes?since=SEQ&epoch=EPOCH y /health en JSON; /metrics en texto Prometheus"""
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            query = parse_qs(url.query)
+            if url.path == '/status':
+                body = service.store.payload(full=True)
+            elif url.path == '/changes':
+                try:
+                    since = int(query.get('since', ['0'])[0])
+                except ValueError:
+                    self.send_error(400, "since inválido")
+                    return
+                body = service.store.changes_since(since, query.get('epoch', [''])[0])
+            elif url.path == '/health':
+                body = service.health()
+            elif url.path == '/metrics':
+                # Texto ya renderizado tras el último barrido: el costo no depende del inventario
+                self._send(service.metrics, METRICS_CONTENT_TYPE)
+                return
+            else:
+                self.send_error(404)
+                return
+            self._send(json.dumps(body, separators=(',', ':')).encode('utf-8'), 'application/json')
+
+        def _send(self, data, content_type):
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            logging.debug("Servicio de sondeo %s: " + format, self.client_address[0], *args)
+
+    return ProbeServiceHandler
+
+class ProbeService:
+    """Daemon de sondeo compartido: barre el inventario y sirve el estado por HTTP.
+
+    El barrido corre en un hilo con su propio loop asyncio (o en workers por
+    shards si `workers` > 0) y vuelca cada resultado en un ProbeStateStore.
+    Después de cada barrido renderiza las métricas de Prometheus (/metrics) y,
+    si se indicó `metrics_textfile`, las escribe para el textfile collector de
+    node_exporter; ninguna de las dos salidas dispara sondeos.
+    """
+
+    def __init__(self, inventory, interval=10, concurrency=256, workers=0,
+                 strategy='subnet', probe_ping=True, reload_interval=SERVICE_RELOAD,
+                 metrics_textfile=None):
+        self.inventory = inventory
+        self.interval = interval
+        self.concurrency = concurrency
+        self.probe_ping = probe_ping
+        self.reload_interval = reload_interval
+        self.prober = ShardedProber(workers, strategy, interval, concurrency, probe_ping) if workers > 0 else None
+        self.store = ProbeStateStore()
+        self.hosts = []           # [(ip, puerto_ssh)] únicos y válidos
+        self.reloaded_at = None
+        self.last_sweep = None    # Duración del último barrido completo (segundos)
+        self.records_by_ip = {}   # IP -> HostRecord (etiquetas de las métricas)
+        self.sweeps = 0
+        self.errors = {'probe': 0, 'inventory': 0}  # 'probe': fallas fuera de PROBE_ERRORS y de workers ya detenidos
+        self.shard_stats = []     # Último ShardStats de cada worker (modo por shards)
+        self.sweeps_base = 0      # Barridos completos hechos por workers anteriores a la última recarga
+        self.metrics_textfile = metrics_textfile
+        self.metrics = b''        # Última exposición renderizada
+        self.stop_event = threading.Event()
+        self.server = None
+
+    def health(self):
+        return {
+            'epoch': self.store.epoch, 'seq': self.store.seq, 'hosts': len(self.hosts),
+            'inventory': self.inventory.describe(), 'last_sweep': self.last_sweep,
+        }
+
+    def start(self, address=SERVICE_LISTEN):
+        """Abre el servidor HTTP y arranca el barrido; devuelve (host, puerto) efectivos"""
+        from http.server import ThreadingHTTPServer
+
+        self.server = ThreadingHTTPServer(parse_listen_address(address), _make_service_handler(self))
+        self.server.daemon_threads = True
+        self.render_metrics()
+        threading.Thread(target=self._sweep_main, name='itool-service-sweep', daemon=True).start()
+        threading.Thread(target=self.server.serve_forever, name='itool-service-http', daemon=True).start()
+        host, port = self.server.server_address[:2]
+        logging.info("Servicio de sondeo escuchando en http://%s:%d (%s)", host, port, self.inventory.describe())
+        return host, port
+
+    def stop(self):
+        self.stop_event.set()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+        if self.prober:
+            self.prober.stop()
+
+    def serve_forever(self, address=SERVICE_LISTEN):
+        self.start(address)
+        try:
+            while not self.stop_event.wait(1):
+                pass
+        except KeyboardInterrupt:
+            logging.info("Deteniendo servicio de sondeo")
+        finally:
+            self.stop()
+
+    def _reload_hosts(self):
+        """Relee el inventario si cambió; devuelve True si cambió la lista de hosts"""
+        self.reloaded_at = time.monotonic()
+        records, changed = self.inventory.fetch()
+        if not changed and self.hosts:
+            return False
+        hosts = {}
+        records_by_ip = {}
+        for pc in records:
+            if pc.ip_valid and pc.ip not in hosts:
+                hosts[pc.ip] = get_ssh_port(pc.ip, pc)
+                records_by_ip[pc.ip] = pc
+        self.hosts = list(hosts.items())
+        self.records_by_ip = records_by_ip
+        self.store.retain(hosts)
+        logging.info("Servicio de sondeo: %d hosts a sondear", len(self.hosts))
+        return True
+
+    def render_metrics(self):
+        """Arma la exposición de Prometheus desde el estado publicado y la guarda en caché"""
+        with self.store.cond:
+            statuses = [(ip, status) for ip, (_, status) in self.store.hosts.items()]
+        labels = {}
+        for ip, _ in statuses:
+            pc = self.records_by_ip.get(ip)
+            vlan = (pc.ip_int >> 8) & 0xFF if pc and pc.ip_int >= 0 else ''
+            labels[ip] = (
+                f'ip="{_metric_label(ip)}",hostname="{_metric_label(pc.hostname if pc else "")}",'
+                f'titular="{_metric_label(pc.titular if pc else "")}",vlan="{vlan}"'
+            )
+        lines = []
+        for name, help_text, field in HOST_METRICS:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            lines += [f"{name}{{{labels[ip]}}} {int(getattr(status, field))}" for ip, status in statuses]
+        lines += ["# HELP itool_host_rtt_seconds RTT del último ping respondido",
+                  "# TYPE itool_host_rtt_seconds gauge"]
+        lines += [
+            f"itool_host_rtt_seconds{{{labels[ip]}}} {status.rtt_ms / 1000:.6f}"
+            for ip, status in statuses if status.rtt_ms is not None
+        ]
+        lines += ["# HELP itool_host_last_check_timestamp_seconds Hora del último sondeo del host",
+                  "# TYPE itool_host_last_check_timestamp_seconds gauge"]
+        lines += [
+            f"itool_host_last_check_timestamp_seconds{{{labels[ip]}}} {status.checked_at:.3f}"
+            for ip, status in statuses
+        ]
+        lines += ["# HELP itool_hosts Hosts únicos a sondear", "# TYPE itool_hosts gauge",
+                  f"itool_hosts {len(self.hosts)}"]
+        if self.last_sweep is not None:
+            lines += ["# HELP itool_sweep_duration_seconds Duración del último barrido completo",
+                      "# TYPE itool_sweep_duration_seconds gauge",
+                      f"itool_sweep_duration_seconds {self.last_sweep:.3f}"]
+        lines += ["# HELP itool_sweeps_total Barridos completos realizados",
+                  "# TYPE itool_sweeps_total counter", f"itool_sweeps_total {self.sweeps}"]
+        if self.shard_stats:
+            lines += ["# HELP itool_shard_sweeps_total Barridos completos de cada worker",
+                      "# TYPE itool_shard_sweeps_total counter"]
+            lines += [f'itool_shard_sweeps_total{{shard="{n}"}} {stats.sweeps}'
+                      for n, stats in enumerate(self.shard_stats)]
+            lines += ["# HELP itool_shard_sweep_duration_seconds Duración del último barrido de cada worker",
+                      "# TYPE itool_shard_sweep_duration_seconds gauge"]
+            lines += [f'itool_shard_sweep_duration_seconds{{shard="{n}"}} {stats.last_sweep:.3f}'
+                      for n, stats in enumerate(self.shard_stats) if stats.sweeps]
+        errors = dict(self.errors)
+        errors['probe'] += PROBE_ERRORS.count + sum(stats.errors for stats in self.shard_stats)
+        lines += ["# HELP itool_probe_errors_total Errores de sondeo y de recarga del inventario",
+                  "# TYPE itool_probe_errors_total counter"]
+        lines += [f'itool_probe_errors_total{{kind="{kind}"}} {count}' for kind, count in errors.items()]
+        self.metrics = ('\n'.join(lines) + '\n').encode('utf-8')
+        if self.metrics_textfile:
+            self._write_textfile()
+
+    def _write_textfile(self):
+        """Escribe las métricas de forma atómica (node_exporter no debe leer archivos a medias)"""
+        temp_path = f"{self.metrics_textfile}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'wb') as fh:
+                fh.write(self.metrics)
+            os.replace(temp_path, self.metrics_textfile)
+        except OSError as e:
+            logging.error("No se pudieron escribir las métricas en %s: %s", self.metrics_textfile, e)
+
+    def _sweep_main(self):
+        try:
+            asyncio.run(self._sweep_loop())
+        except Exception as e:
+            logging.error("El barrido del servicio de sondeo terminó con error: %s", e)
+
+    def _restart_prober(self):
+        """Relanza los workers con la lista de hosts actual; sus errores pasan al total"""
+        self.errors['probe'] += sum(stats.errors for stats in self.prober.shard_stats())
+        self.prober.start(list(self.records_by_ip.values()))
+        self.shard_stats = []
+        self.sweeps_base = self.sweeps
+
+    def _collect_shard_stats(self):
+        """Lee los barridos de los workers: el inventario completo lleva tantos como el worker más atrasado"""
+        self.shard_stats = self.prober.shard_stats()
+        if not self.shard_stats:
+            return
+        sweeps = self.sweeps_base + min(stats.sweeps for stats in self.shard_stats)
+        if sweeps > self.sweeps:
+            self.sweeps = sweeps
+            self.last_sweep = max(stats.last_sweep for stats in self.shard_stats)
+            logging.debug(
+                "Servicio de sondeo: barrido de %d hosts en %d workers, el más lento en %.1f s",
+                len(self.hosts), len(self.shard_stats), self.last_sweep
+            )
+
+    async def _sweep_loop(self):
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def probe(ip, port_ssh):
+            try:
+                async with semaphore:
+                    online, ssh_open, rdp_open, rtt_ms = await probe_host(ip, port_ssh, self.probe_ping)
+            except Exception as e:
+                PROBE_ERRORS.record(e)
+                logging.debug("Servicio de sondeo: error al sondear %s: %s", ip, e)
+                return
+            self.store.update(ip, ProbeStatus(online, ssh_open, rdp_open, rtt_ms, time.time()))
+
+        rendered_at = time.monotonic()
+        while not self.stop_event.is_set():
+            started = time.monotonic()
+            if self.reloaded_at is None or started - self.reloaded_at >= self.reload_interval:
+                try:
+                    if await loop.run_in_executor(None, self._reload_hosts) and self.prober:
+                        self._restart_prober()
+                except Exception as e:
+                    self.errors['inventory'] += 1
+                    logging.error("Servicio de sondeo: error al recargar el inventario: %s", e)
+            if self.prober:
+                # Los workers sondean solos; sólo se copia su array al estado publicado
+                for ip, status in self.prober.poll():
+                    self.store.update(ip, status)
+                self._collect_shard_stats()
+                if started - rendered_at >= self.interval:
+                    rendered_at = started
+                    self.render_metrics()
+                await asyncio.sleep(PROBER_POLL_MS / 1000)
+                continue
+            await asyncio.gather(*(probe(ip, port) for ip, port in self.hosts))
+            self.last_sweep = time.monotonic() - started
+            self.sweeps += 1
+            self.render_metrics()
+            logging.debug("Servicio de sondeo: barrido de %d hosts en %.1f s", len(self.hosts), self.last_sweep)
+            while not self.stop_event.is_set() and time.monotonic() - started < self.interval:
+                await asyncio.sleep(0.2)
+
+class ProbeServiceClient:
+    """Suscripción de la UI a un ProbeService remoto o local.
+
+    Expone la misma interfaz que ShardedProber (`start`, `stop`, `poll`): un hilo
+    hace long poll de /changes y `poll()` devuelve sólo los hosts que cambiaron
+    desde la llamada anterior.
+    """
+
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+        self.statuses = {}     # ip -> ProbeStatus
+        self.changed = set()   # IPs con cambios aún no entregados por poll()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.epoch = ''
+        self.seq = 0
+
+    def start(self, records):
+        """Arranca la suscripción (una sola vez; el servicio sigue su propio inventario)"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._subscribe, name='itool-service-client', daemon=True)
+            self.thread.start()
+        missing = sum(1 for pc in records if pc.ip not in self.statuses)
+        if self.statuses and missing:
+            logging.debug("Servicio de sondeo: %d hosts del inventario local sin estado publicado", missing)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def status(self, ip):
+        with self.lock:
+            return self.statuses.get(ip)
+
+    def poll(self):
+        with self.lock:
+            changed, self.changed = self.changed, set()
+            return [(ip, self.statuses[ip]) for ip in changed if ip in self.statuses]
+
+    def _fetch(self, path, timeout):
+        from urllib.request import urlopen
+
+        with urlopen(self.url + path, timeout=timeout) as response:
+            return json.load(response)
+
+    def _apply(self, payload):
+        statuses = {ip: ProbeStatus(*values) for ip, values in payload['hosts'].items()}
+        with self.lock:
+            if payload.get('full'):
+                self.statuses = {}
+            self.statuses.update(statuses)
+            self.changed.update(statuses)
+        self.epoch = payload['epoch']
+        self.seq = payload['seq']
+
+    def _subscribe(self):
+        delay = 1
+        while not self.stop_event.is_set():
+            try:
+                self._apply(self._fetch(
+                    f"/changes?since={self.seq}&epoch={self.epoch}", SERVICE_LONG_POLL + 10
+                ))
+                delay = 1
+            except Exception as e:
+                logging.warning("Servicio de sondeo %s no disponible: %s", self.url, e)
+                self.stop_event.wait(delay)
+                delay = min(delay * 2, SERVICE_RETRY_MAX)
+
+# --- Paleta de conexión rápida (Ctrl+K) ---
+# Búsqueda difusa sobre un índice precalculado, independiente del grid. Una
+# consulta de un solo término se resuelve primero con un índice ordenado de
+# inicios de palabra (búsqueda binaria + top-k, sin recorrer el inventario); si no alcanza,
+# se buscan substrings saltando por el corpus y, con menos de k, subsecuencias.
+PALETTE_TOP_K = 12
+PALETTE_REFRESH_MS = 1000  # Refresco del estado en vivo de los resultados mostrados
+PALETTE_FIELD_BONUS = (20, 10, 0)  # hostname, ip, titular
+# Puntaje base de una coincidencia; se le resta su posición en el campo y el largo del campo
+PALETTE_PREFIX_SCORE = 300     # Al inicio del campo
+PALETTE_WORD_SCORE = 250       # Al inicio de una palabra
+PALETTE_SUBSTRING_SCORE = 200  # En medio de una palabra
+PALETTE_FUZZY_SCORE = 100      # Subsecuencia con huecos dentro del campo
+_CANDIDATE_BITS = 24  # Códigos del índice: puntaje << 24 | (2**24 - 1 - candidato)
+_CANDIDATE_MASK = (1 << _CANDIDATE_BITS) - 1
+_WORD_START_RE = re.compile(r'(?<![^\W_])(?=[^\n])')  # Sin alfanumérico antes, dentro de un campo
+
+class QuickConnectIndex:
+    """Índice de candidatos de la paleta: una entrada por registro del inventario.
+
+    Cada candidato es el texto "hostname\nip\ntitular" (en minúsculas) con los
+    límites de cada campo. El puntaje de un término es el de su mejor aparición:
+    inicio del campo > inicio de palabra > dentro de una palabra > subsecuencia con
+    huecos; a igual tipo gana la aparición más temprana y el campo más corto, y
+    hostname > ip > titular. Con varios términos se suman.
+
+    Los inicios de palabra de todo el inventario están ordenados por el texto que
+    sigue (`word_pos`) junto con el código de su puntaje (`word_codes`): todas las
+    apariciones de un término al inicio de una palabra forman un rango contiguo.
+    Como una aparición en medio de una palabra nunca suma más que
+    `_inner_bound(term)`, si el rango tiene k candidatos por encima de esa cota
+    esos son exactamente los k mejores.
+
+    `search(query)` devuelve hasta k (puntaje, HostRecord) de mejor a peor.
+    """
+
+    def __init__(self, records):
+        self.records = list(records)
+        self.entries = []  # (texto, inicio de la ip, inicio del titular)
+        self.offsets = []  # Inicio de cada candidato dentro de `corpus`
+        words = []         # (texto desde el inicio de palabra, posición en el corpus, código)
+        offset = 0
+        for i, pc in enumerate(self.records):
+            fields = (pc.hostname_key, pc.ip.lower(), pc.titular_key)
+            ip_start = len(fields[0]) + 1
+            titular_start = ip_start + len(fields[1]) + 1
+            self.entries.append(('\n'.join(fields), ip_start, titular_start))
+            self.offsets.append(offset)
+            candidate = _CANDIDATE_MASK - i
+            for field, bonus in zip(fields, PALETTE_FIELD_BONUS):
+                # Mismo puntaje que _occurrence_score para el inicio del campo o de una palabra
+                for match in _WORD_START_RE.finditer(field):
+                    pos = match.start()
+                    score = (PALETTE_WORD_SCORE - pos if pos else PALETTE_PREFIX_SCORE) - len(field) + bonus
+                    words.append((field[pos:] + '\n', offset + pos, score << _CANDIDATE_BITS | candidate))
+                offset += len(field) + 1
+        # Todos los textos en uno solo (terminado en \n): subsecuencias con una pasada de
+        # regex, substrings con find y claves del índice de palabras sin copiar strings
+        self.corpus = ''.join(text + '\n' for text, _, _ in self.entries)
+        words.sort(key=itemgetter(0))  # Estable: a igual texto queda el orden del corpus
+        self.word_pos = array('I', [pos for _, pos, _ in words])
+        self.word_codes = array('q', [code for _, _, code in words])
+
+    def __len__(self):
+        return len(self.records)
+
+    @staticmethod
+    def _field(pos, text_len, ip_start, titular_start):
+        """(inicio, fin, bonus) del campo que contiene la posición `pos`"""
+        if pos < ip_start:
+            return 0, ip_start - 1, PALETTE_FIELD_BONUS[0]
+        if pos < titular_start:
+            return ip_start, titular_start - 1, PALETTE_FIELD_BONUS[1]
+        return titular_start, text_len, PALETTE_FIELD_BONUS[2]
+
+    @classmethod
+    def _occurrence_score(cls, text, pos, ip_start, titular_start):
+        """Puntaje de una aparición (como substring) que empieza en `pos`"""
+        start, end, bonus = cls._field(pos, len(text), ip_start, titular_start)
+        if pos == start:
+            base = PALETTE_PREFIX_SCORE
+        elif not text[pos - 1].isalnum():
+            base = PALETTE_WORD_SCORE
+        else:
+            base = PALETTE_SUBSTRING_SCORE
+        return base - (pos - start) - (end - start) + bonus
+
+    @staticmethod
+    def _inner_bound(term):
+        """Cota del puntaje de `term` en medio de una palabra o como subsecuencia"""
+        # Posición >= 1 y campo de al menos 1 + len(term) caracteres
+        return PALETTE_SUBSTRING_SCORE + max(PALETTE_FIELD_BONUS) - 2 - len(term)
+
+    def _substring_score(self, term, text, pos, ip_start, titular_start):
+        """Puntaje de la mejor aparición de `term`, que aparece por primera vez en `pos`"""
+        best = None
+        while pos >= 0:
+            score = self._occurrence_score(text, pos, ip_start, titular_start)
+            if best is None or score > best:
+                best = score
+            pos = text.find(term, pos + 1)
+        return best
+
+    def _word_range(self, term):
+        """Rango [lo, hi) de `word_pos` con las palabras que empiezan con `term`.
+
+        Búsqueda binaria comparando el corpus en cada posición (bisect recién acepta
+        `key=` desde Python 3.10).
+        """
+        corpus = self.corpus
+        positions = self.word_pos
+        size = len(term)
+        lo, hi = 0, len(positions)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            pos = positions[mid]
+            if corpus[pos:pos + size] < term:
+                lo = mid + 1
+            else:
+                hi = mid
+        first, hi = lo, len(positions)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            pos = positions[mid]
+            if term < corpus[pos:pos + size]:
+                hi = mid
+            else:
+                lo = mid + 1
+        return first, lo
+
+    def _word_top(self, term, k):
+        """Los k mejores candidatos para un único término desde el índice de palabras.
+
+        None si el rango no tiene k candidatos por encima de `_inner_bound(term)`
+        (entonces podría ganar una aparición en medio de una palabra).
+        """
+        lo, hi = self._word_range(term)
+        floor = self._inner_bound(term) << _CANDIDATE_BITS | _CANDIDATE_MASK
+        codes = self.word_codes[lo:hi]
+        want = 2 * k
+        while True:
+            best = {}  # candidato -> mejor código, de mayor a menor
+            for code in heapq.nlargest(want, codes):
+                if code <= floor:
+                    return None
+                best.setdefault(_CANDIDATE_MASK - (code & _CANDIDATE_MASK), code)
+                if len(best) == k:
+                    return [(code >> _CANDIDATE_BITS, self.records[i]) for i, code in best.items()]
+            if want >= len(codes):
+                return None
+            want *= 4  # Varias apariciones del término en los mismos candidatos
+
+    def _containing(self, term):
+        """Candidatos cuyo texto contiene `term`: un `find` por candidato sobre el corpus"""
+        corpus = self.corpus
+        offsets = self.offsets
+        last = len(offsets) - 1
+        pos = corpus.find(term)
+        while pos >= 0:
+            i = bisect.bisect_right(offsets, pos) - 1
+            yield i
+            if i == last:
+                return
+            pos = corpus.find(term, offsets[i + 1])
+
+    def _fuzzy_scores(self, term):
+        """Candidato -> mejor puntaje de `term` como subsecuencia dentro de un campo.
+
+        Cada caracter se busca en su primera aparición tras el anterior (`[^c\n]*c`),
+        lo que da la coincidencia de menor extensión desde cada inicio sin
+        backtracking. Las coincidencias se solapan: tras una se vuelve a buscar desde
+        el caracter siguiente a su inicio, porque un inicio posterior puede dar una
+        extensión menor ("abc" en "aabxc" empieza mejor en la segunda "a").
+        """
+        chars = [re.escape(ch) for ch in term]
+        pattern = re.compile(chars[0] + ''.join(f"[^{ch}\n]*{ch}" for ch in chars[1:]))
+        offsets = self.offsets
+        entries = self.entries
+        field = self._field
+        bisect_right = bisect.bisect_right
+        base = PALETTE_FUZZY_SCORE + len(term)
+        search = pattern.search
+        corpus = self.corpus
+        scores = {}
+        match = search(corpus)
+        while match is not None:
+            match_start, match_end = match.span()
+            match = search(corpus, match_start + 1)
+            i = bisect_right(offsets, match_start) - 1
+            text, ip_start, titular_start = entries[i]
+            start, end, bonus = field(match_start - offsets[i], len(text), ip_start, titular_start)
+            score = base - (match_end - match_start) - (end - start) + bonus  # Huecos = extensión - largo
+            if score > scores.get(i, -1 << 30):
+                scores[i] = score
+        return scores
+
+    def search(self, query, k=PALETTE_TOP_K):
+        terms = query.lower().split()
+        if not terms:
+            return []
+        if len(terms) == 1:
+            top = self._word_top(terms[0], k)
+            if top is not None:
+                return top
+        entries = self.entries
+        substring_score = self._substring_score
+        scored = []
+        # El término más largo suele ser el más selectivo: sólo se revisan sus candidatos
+        for i in self._containing(max(terms, key=len)):
+            text, ip_start, titular_start = entries[i]
+            total = 0
+            for term in terms:
+                pos = text.find(term)
+                if pos < 0:
+                    break
+                total += substring_score(term, text, pos, ip_start, titular_start)
+            else:
+                scored.append((total, -i))
+        if len(scored) < k:
+            # Pocas coincidencias exactas: completar con coincidencias difusas (un
+            # substring también es subsecuencia, así que cada mapa incluye los exactos)
+            fuzzy = [self._fuzzy_scores(term) for term in terms]
+            exact = {-i for _, i in scored}
+            if len(terms) == 1:
+                # Sin substring, el puntaje es directamente el de la subsecuencia
+                scored += [(score, -i) for i, score in fuzzy[0].items() if i not in exact]
+                return [(score, self.records[-i]) for score, i in heapq.nlargest(k, scored)]
+            for i in min(fuzzy, key=len):
+                if i in exact or not all(i in scores for scores in fuzzy):
+                    continue
+                text, ip_start, titular_start = entries[i]
+                total = 0
+                for term, scores in zip(terms, fuzzy):
+                    pos = text.find(term)
+                    total += (substring_score(term, text, pos, ip_start, titular_start)
+                              if pos >= 0 else scores[i])
+                scored.append((total, -i))
+        return [(score, self.records[-i]) for score, i in heapq.nlargest(k, scored)]
+
+def quick_connect_label(pc, online, rdp_open, ssh_open):
+    """Texto de una fila de la paleta con el estado en vivo del host"""
+    def flag(value):
+        return '?' if value is None else ('✓' if value else '✗')
+    return (f"{pc.hostname[:24]:<24} {pc.ip:<15} {pc.titular[:24]:<24} "
+            f"ping {flag(online)}  RDP {flag(rdp_open)}  SSH {flag(ssh_open)}")
+
+class QuickConnectPalette(tk.Toplevel):
+    """Ventana de conexión rápida: se busca con el teclado y se conecta con una tecla.
+
+    Enter conecta por RDP, Shift+Enter por SSH; flechas para elegir y Escape cierra.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.app = app
+        self.index = None
+        self.results = []   # HostRecord mostrados, en orden
+        self.labels = []    # Texto actual de cada fila (sólo se reescriben las que cambian)
+        self.title("Conexión rápida")
+        self.transient(app)
+        self.resizable(False, False)
+
+        self.query_var = tk.StringVar()
+        entry = tk.Entry(self, textvariable=self.query_var, font=('Arial', 12))
+        entry.pack(fill='x', padx=6, pady=(6, 2))
+        self.listbox = tk.Listbox(self, height=PALETTE_TOP_K, width=90, font=('Courier', 10),
+                                  activestyle='none', exportselection=False)
+        self.listbox.pack(fill='both', padx=6)
+        self.status = tk.Label(self, anchor='w', fg='grey')
+        self.status.pack(fill='x', padx=6, pady=(2, 6))
+
+        self.query_var.trace_add('write', lambda *_: self.update_results())
+        entry.bind('<Down>', lambda e: self.move_selection(1))
+        entry.bind('<Up>', lambda e: self.move_selection(-1))
+        entry.bind('<Return>', lambda e: self.connect('rdp'))
+        entry.bind('<Shift-Return>', lambda e: self.connect('ssh'))
+        entry.bind('<Control-k>', lambda e: 'break')  # Ya abierta: no borrar la consulta
+        entry.bind('<Control-K>', lambda e: 'break')
+        self.listbox.bind('<Double-Button-1>', lambda e: self.connect('rdp'))
+        self.bind('<Escape>', lambda e: self.destroy())
+        entry.focus_set()
+        self.update_results()
+        self.after(PALETTE_REFRESH_MS, self._refresh_status)
+
+    def update_results(self):
+        """Vuelve a rankear con la consulta actual (una vez por tecla)"""
+        self.index = self.app.quick_index
+        if self.index is None:
+            self._show([], "Cargando inventario…")
+            return
+        started = time.perf_counter()
+        matches = self.index.search(self.query_var.get())
+        elapsed = (time.perf_counter() - started) * 1000
+        self._show(
+            [pc for _, pc in matches],
+            f"{len(self.index)} hosts · {elapsed:.1f} ms · Enter: RDP · Shift+Enter: SSH · Esc: cerrar"
+        )
+
+    def _show(self, results, status_text):
+        self.results = results
+        self.labels = []
+        self.listbox.delete(0, 'end')
+        self._refresh_rows()
+        if results:
+            self.listbox.selection_set(0)
+        self.status.config(text=status_text)
+
+    def _refresh_rows(self):
+        """Escribe el estado en vivo de las filas mostradas que cambiaron"""
+        app = self.app
+        for row, pc in enumerate(self.results):
+            online = app.ping_cache.get(pc.ip)
+            text = quick_connect_label(pc, online, app.rdp_port_cache.get(pc.ip), app.ssh_port_cache.get(pc.ip))
+            if row < len(self.labels) and self.labels[row] == text:
+                continue
+            selected = self.listbox.selection_includes(row)
+            self.listbox.delete(row)
+            self.listbox.insert(row, text)
+            self.listbox.itemconfig(row, foreground='grey' if online is None else ('green' if online else 'red'))
+            if selected:
+                self.listbox.selection_set(row)
+            if row < len(self.labels):
+                self.labels[row] = text
+            else:
+                self.labels.append(text)
+
+    def _refresh_status(self):
+        if not self.winfo_exists():
+            return
+        if self.app.quick_index is not self.index:
+            self.update_results()  # Se recargó el inventario
+        else:
+            self._refresh_rows()
+        self.after(PALETTE_REFRESH_MS, self._refresh_status)
+
+    def move_selection(self, step):
+        if not self.results:
+            return 'break'
+        current = self.listbox.curselection()
+        row = min(max((current[0] if current else 0) + step, 0), len(self.results) - 1)
+        self.listbox.selection_clear(0, 'end')
+        self.listbox.selection_set(row)
+        self.listbox.see(row)
+        return 'break'
+
+    def connect(self, protocol):
+        current = self.listbox.curselection()
+        if not current or current[0] >= len(self.results):
+            return 'break'
+        pc = self.results[current[0]]
+        logging.info("Conexión rápida (%s) a %s", protocol.upper(), pc.hostname or pc.ip)
+        self.destroy()
+        if protocol == 'ssh':
+            self.app.connect_ssh(pc)
         else:
-            button.config(state="disabled")
-            # Agregar ✗ según el tipo de botón
-            if "Mirroring" in button.cget('text') or button.cget('text') == "✗":
-                button.config(text="✗")
-            elif "RDP" in button.cget('text') or button.cget('text') == "✗":
-                button.config(text="✗")
+            self.app.connect_login_remoto(pc)
+        return 'break'
 
 class iToolApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, inventory=None, probe_options=None, startup_report=None):
         super().__init__()
         self.title("iTool")
         # Plataforma
@@ -322,14 +2320,37 @@ class iToolApp(tk.Tk):
         # Estructuras de datos
         self.pc_list = []
         self.filtered_list = []
-        self.leds = []
-        self.ssh_buttons = []
-        self.rdp_buttons = []  # Para trackear botones RDP
+        # Widgets de estado por IP: ip -> [(tipo, widget)] con tipo led/ssh/rdp/mirror
+        self.row_widgets = {}
+        self.widget_state = {}     # widget -> último estado aplicado
+        # Resultados de sondeo (kind, ip, valor) encolados desde hilos/corutinas;
+        # sólo el hilo de Tk los vacía y toca los widgets
+        self.ui_updates = queue.SimpleQueue()
+        self.ui_stats = {'applied': 0, 'skipped': 0, 'dropped': 0}
+        self.leds_running = False  # Evita barridos de ping superpuestos
+
+        # Vista agrupada por VLAN (/24): grupos dibujados y VLANs expandidas
+        self.groups = []             # [{'key', 'hosts', 'base_row', 'header', 'widgets', 'rows', 'text'}]
+        self.expanded_groups = set() # Claves de grupo expandidas (se conservan entre recargas)
+        self.group_sample_cursor = 0 # Rotación del muestreo de grupos colapsados
+        self.group_headers_at = 0.0  # Último refresco de contadores de los encabezados
+        self.hosts_by_ip = {}  # IP -> HostRecord (puerto SSH, validez de la IP)
+        self.host_index = None # Índice de IPs de pc_list (se arma al terminar cada carga)
+        self.quick_index = None   # Candidatos de la paleta de conexión rápida (Ctrl+K)
+        self.quick_palette = None
         self.filter_timer = None   # Para debounce del filtro
         self.sort_column = None    # Columna actual de ordenamiento
         self.sort_ascending = True # Dirección del ordenamiento
         self.window_size_set = False  # Flag para evitar múltiples ajustes de ventana
 
+        # Fuente de inventario y carga en streaming (hilo lector -> cola -> hilo de Tk)
+        self.inventory = inventory or get_inventory()
+        self.inventory_queue = queue.Queue()
+        self.loading = False          # Hay una carga de inventario en curso
+        self.load_started = False     # La carga actual ya recibió su primer bloque
+        self.load_generation = 0      # Carga vigente: los bloques de cargas abortadas se descartan
+        self.overflow_note = None     # Fila final con las PCs que no entran en el grid
+
         # Cache para resultados de ping y puertos
         self.ping_cache = {}       # IP -> bool (ping result)
         self.ssh_port_cache = {}   # IP -> bool (port ssh_port)
@@ -337,6 +2358,23 @@ class iToolApp(tk.Tk):
         self.cache_timeout = 30    # Segundos antes de invalidar cache
         self.last_check_time = {}  # IP -> timestamp
 
+        # Sondeo externo opcional (clave 'probe' de config.json, --probe-workers o
+        # --probe-service): un servicio compartido o workers por shards
+        options = {**PROBE_DEFAULTS, **(probe_options or CONFIG.get('probe') or {})}
+        self.prober = None
+        if options['service']:
+            self.prober = ProbeServiceClient(options['service'])
+            logging.info("Estado de hosts desde el servicio de sondeo %s", options['service'])
+        elif int(options['workers']) > 0:
+            self.prober = ShardedProber(
+                options['workers'], options['shard_strategy'],
+                float(options['interval']), int(options['concurrency'])
+            )
+
+        # Reporte de arranque (--startup-report): se escribe y se cierra al mostrar el primer grid
+        self.startup_report = startup_report
+        self.bind('<Map>', self._on_first_map, add='+')
+
         # Hacer que la ventana no sea redimensionable
         self.resizable(False, False)
 
@@ -344,6 +2382,32 @@ class iToolApp(tk.Tk):
         self.create_widgets()
         self.refresh_data()
         self.update_leds()
+        self.after(UI_FRAME_MS, self._drain_ui_updates)
+        if self.prober:
+            self.after(PROBER_POLL_MS, self._poll_prober)
+
+    def _on_first_map(self, event):
+        """Registra el primer frame de la ventana principal (una sola vez)"""
+        if event.widget is self and 'first_frame' not in STARTUP_MARKS:
+            mark_startup('first_frame')
+            logging.info("Ventana visible en %.3f s", STARTUP_MARKS['first_frame'])
+
+    def _mark_first_grid(self):
+        """Registra el primer grid con datos y, si se pidió, escribe el reporte de arranque"""
+        if 'first_grid' in STARTUP_MARKS:
+            return
+        mark_startup('first_grid')
+        logging.info("Primer grid en %.3f s", STARTUP_MARKS['first_grid'])
+        if not self.startup_report:
+            return
+        self.update_idletasks()  # Que el grid esté efectivamente dibujado antes de medir
+        mark_startup('first_grid_drawn')
+        try:
+            with open(self.startup_report, 'w', encoding='utf-8') as fh:
+                json.dump(STARTUP_MARKS, fh, indent=2)
+        except OSError as e:
+            logging.error("No se pudo escribir el reporte de arranque %s: %s", self.startup_report, e)
+        self.after(0, self.destroy)
 
     def _set_app_icon(self):
         """Configura el icono de la ventana según el sistema operativo.
@@ -371,14 +2435,14 @@ class iToolApp(tk.Tk):
                             self.iconbitmap(p)
                             return
                         except Exception as e:
-                            logging.debug(f"iconbitmap con ICO falló: {e}")
+                            logging.debug("iconbitmap con ICO falló: %s", e)
                 for p in png_candidates:
                     if os.path.exists(p):
                         try:
                             self.iconphoto(True, tk.PhotoImage(file=p))
                             return
                         except Exception as e:
-                            logging.debug(f"iconphoto con PNG falló: {e}")
+                            logging.debug("iconphoto con PNG falló: %s", e)
             else:
                 # En Linux/macOS, preferir PNG pero hacer fallback a ICO si es lo único
                 for p in png_candidates:
@@ -387,18 +2451,18 @@ class iToolApp(tk.Tk):
                             self.iconphoto(True, tk.PhotoImage(file=p))
                             return
                         except Exception as e:
-                            logging.debug(f"iconphoto con PNG falló: {e}")
+                            logging.debug("iconphoto con PNG falló: %s", e)
                 for p in ico_candidates:
                     if os.path.exists(p):
                         try:
                             self.iconphoto(True, tk.PhotoImage(file=p))
                             return
                         except Exception as e:
-                            logging.debug(f"iconphoto con ICO falló: {e}")
+                            logging.debug("iconphoto con ICO falló: %s", e)
 
             logging.warning("Icono de app no encontrado. Ubicá utils/app.ico (Windows) o utils/app.png (Linux/macOS). También se aceptan utils/icon.ico y utils/icon.png.")
         except Exception as e:
-            logging.debug(f"No se pudo establecer icono: {e}")
+            logging.debug("No se pudo establecer icono: %s", e)
 
     def _set_windows_app_id(self):
         """Establece el AppUserModelID en Windows para mejorar el ícono y el agrupado en la taskbar.
@@ -412,7 +2476,7 @@ class iToolApp(tk.Tk):
                 app_id = u"com.itool.app"
                 ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(app_id)
         except Exception as e:
-            logging.debug(f"No se pudo fijar AppUserModelID: {e}")
+            logging.debug("No se pudo fijar AppUserModelID: %s", e)
 
     def create_widgets(self):
         # Frame principal para organizar la interfaz
@@ -430,8 +2494,16 @@ class iToolApp(tk.Tk):
         search_entry.bind('<KeyRelease>', self.on_search_change)
         search_entry.bind('<Return>', lambda e: self.apply_filter())
         search_entry.bind('<Escape>', lambda e: self.clear_filter())
+        # El bind_all de Ctrl+K corre después de la clase Entry, que borraría hasta el final
+        search_entry.bind('<Control-k>', self.open_quick_connect)
+        search_entry.bind('<Control-K>', self.open_quick_connect)
         tk.Button(search_frame, text="🔍", command=self.apply_filter).pack(side='left', padx=2)
         tk.Button(search_frame, text="🔄", command=self.refresh_data).pack(side='left', padx=2)
+        tk.Button(search_frame, text="⚡", command=self.open_quick_connect).pack(side='left', padx=2)
+        # Vista agrupada por VLAN (grupos colapsados por defecto)
+        self.grouped_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(search_frame, text="VLAN", variable=self.grouped_var,
+                       command=self.update_grid_display).pack(side='left', padx=2)
 
         # Frame para headers (FIJO)
         self.headers_frame = tk.Frame(main_frame, bg='lightgray')
@@ -467,19 +2539,40 @@ class iToolApp(tk.Tk):
         # Bind para scroll con rueda del mouse
         self.canvas.bind("<MouseWheel>", self._on_mousewheel)
 
+        # Paleta de conexión rápida desde cualquier parte de la ventana (los Entry
+        # tienen además su propio bind para ganarle al de su clase)
+        self.bind_all('<Control-k>', self.open_quick_connect)
+        self.bind_all('<Control-K>', self.open_quick_connect)
+
+        # Anchos de columna compartidos por headers y filas
+        self.layout = ColumnLayout(self.scrollable_frame, self.headers_frame)
+        self.column_widths = []  # Últimos minsize aplicados a ambos grids
+
         # Crear headers fijos
         self.create_fixed_headers()
 
+    def open_quick_connect(self, event=None):
+        """Abre (o trae al frente) la paleta de conexión rápida"""
+        if self.quick_palette is not None and self.quick_palette.winfo_exists():
+            self.quick_palette.lift()
+            self.quick_palette.focus_force()
+        else:
+            self.quick_palette = QuickConnectPalette(self)
+        return 'break'
+
+    def is_probeable(self, ip):
+        """Indica si la IP pertenece a un host del inventario con IP válida"""
+        host = self.hosts_by_ip.get(ip)
+        return host is not None and host.ip_valid
+
     def is_cache_valid(self, ip):
         """Verifica si el cache para una IP sigue siendo válido"""
-        import time
         if ip not in self.last_check_time:
             return False
         return time.time() - self.last_check_time[ip] < self.cache_timeout
 
     def update_cache_timestamp(self, ip):
         """Actualiza el timestamp del cache para una IP"""
-        import time
         self.last_check_time[ip] = time.time()
 
     def create_fixed_headers(self):
@@ -487,10 +2580,7 @@ class iToolApp(tk.Tk):
         # Limpiar headers existentes
         for widget in self.headers_frame.winfo_children():
             widget.destroy()
-        headers = ["Titular", "Host", "IP", "Ping", "Mirroring", "RDP", "SSH"]
-        header_keys = ["titular", "hostname", "ip", "", "", "", ""]  # Keys para ordenamiento
-
-        for col, (h, key) in enumerate(zip(headers, header_keys)):
+        for col, (h, key) in enumerate(zip(GRID_HEADERS, GRID_SORT_KEYS)):
             if key:  # Solo las columnas con datos son clickeables
                 text = h
                 if self.sort_column == key:
@@ -498,7 +2588,7 @@ class iToolApp(tk.Tk):
                 header_label = tk.Label(
                     self.headers_frame,
                     text=text,
-                    font=("Arial", 10, "bold"),
+                    font=GRID_HEADER_FONT,
                     bg='lightblue' if self.sort_column == key else 'lightgray',
                     relief='raised', bd=1, cursor="hand2", anchor='w'
                 )
@@ -507,16 +2597,16 @@ class iToolApp(tk.Tk):
                 header_label = tk.Label(
                     self.headers_frame,
                     text=h,
-                    font=("Arial", 10, "bold"),
+                    font=GRID_HEADER_FONT,
                     bg='lightgray', relief='raised', bd=1, anchor='w'
                 )
-            header_label.grid(row=0, column=col, padx=2, pady=1, sticky="nsew")
+            header_label.grid(row=0, column=col, padx=GRID_CELL_PADX, pady=1, sticky="nsew")
 
         self.headers_frame.grid_rowconfigure(0, weight=1)
 
     def sort_by_column(self, column):
         """Ordena la lista por la columna especificada"""
-        logging.info(f"Ordenando por columna: {column}")
+        logging.info("Ordenando por columna: %s", column)
 
         # Si ya estamos ordenando por esta columna, cambiar dirección
         if self.sort_column == column:
@@ -527,18 +2617,8 @@ class iToolApp(tk.Tk):
 
         # Ordenar la lista filtrada
         try:
-            if column == 'ip':
-                # Ordenar primero por VLAN (3er octeto) y luego por host (4to octeto)
-                self.filtered_list.sort(
-                    key=lambda x: ip_vlan_host_sort_key(x.get('ip', '')),
-                    reverse=not self.sort_ascending
-                )
-            else:
-                self.filtered_list.sort(
-                    key=lambda x: str(x.get(column, '')).lower(),
-                    reverse=not self.sort_ascending
-                )
-            logging.debug(f"Lista ordenada por {column}, ascendente: {self.sort_ascending}")
+            self._sort_filtered()
+            logging.debug("Lista ordenada por %s, ascendente: %s", column, self.sort_ascending)
 
             # Actualizar headers para mostrar el indicador de ordenamiento
             self.create_fixed_headers()
@@ -548,7 +2628,17 @@ class iToolApp(tk.Tk):
             self.update_grid_display(from_sort=True)
 
         except Exception as e:
-            logging.error(f"Error al ordenar por {column}: {e}")
+            logging.error("Error al ordenar por %s: %s", column, e)
+
+    def _sort_filtered(self):
+        """Ordena filtered_list según sort_column / sort_ascending"""
+        column = self.sort_column
+        if column == 'ip':
+            # Ordenar primero por VLAN (3er octeto) y luego por host (4to octeto)
+            key = attrgetter('vlan_host_key')
+        else:
+            key = attrgetter(f'{column}_key')
+        self.filtered_list.sort(key=key, reverse=not self.sort_ascending)
 
     def _on_mousewheel(self, event):
         """Permite scroll con la rueda del mouse"""
@@ -562,33 +2652,151 @@ class iToolApp(tk.Tk):
 
     def apply_filter(self):
         """Aplica el filtro después del debounce"""
-        query = self.search_var.get().lower().strip()
-        logging.info(f"Aplicando filtro: '{query}'")
-        if not query:
-            self.filtered_list = self.pc_list.copy()
+        text = self.search_var.get().strip()
+        logging.info("Aplicando filtro: '%s'", text)
+        query = FilterQuery.parse(text)
+        if self.host_index is not None:
+            self.filtered_list = self.host_index.search(query)
         else:
-            self.filtered_list = [
-                pc for pc in self.pc_list
-                if query in str(pc.get('hostname', '')).lower()
-                or query in str(pc.get('ip', '')).lower()
-                or query in str(pc.get('titular', '')).lower()
-            ]
-        logging.debug(f"Resultados del filtro: {len(self.filtered_list)} PCs")
+            # Carga en curso: todavía no hay índice de la lista completa
+            self.filtered_list = self._filter_records(self.pc_list, query)
+        logging.debug("Resultados del filtro: %s PCs", len(self.filtered_list))
         self.update_grid_display()
 
+    def _filter_records(self, records, query=None):
+        """Devuelve los registros que coinciden con la consulta del buscador (recorrido lineal)"""
+        if query is None:
+            query = FilterQuery.parse(self.search_var.get())
+        if query.is_empty():
+            return list(records)
+        return [pc for pc in records if query.matches(pc)]
+
     def refresh_data(self):
-        logging.info("Refrescando datos desde Google Sheets")
+        """Recarga el inventario en segundo plano mostrando las filas a medida que llegan"""
+        if self.loading:
+            logging.debug("Carga de inventario en curso; se ignora el refresco")
+            return
+        logging.info("Refrescando datos desde %s", self.inventory.describe())
+        self.loading = True
+        self.load_started = False
+        self.load_generation += 1
+        threading.Thread(
+            target=self._load_inventory_worker, args=(self.load_generation,), daemon=True
+        ).start()
+        self.after(INVENTORY_POLL_MS, self._drain_inventory_queue)
+
+    def _load_inventory_worker(self, generation):
+        """Lee el inventario en un hilo separado y encola los bloques para el hilo de Tk"""
+        put = self.inventory_queue.put
+        try:
+            changed, revision = self.inventory.check()
+            if not changed and self.pc_list:
+                put((generation, 'unchanged', revision))
+                return
+            for chunk in self.inventory.iter_chunks(revision=revision):
+                if generation != self.load_generation:
+                    return  # La carga se abortó en el hilo de Tk
+                put((generation, 'chunk', chunk))
+            put((generation, 'done', None))
+        except Exception as e:
+            put((generation, 'error', e))
+
+    def _drain_inventory_queue(self):
+        """Aplica los bloques recibidos de a uno por tick para no congelar la UI"""
+        try:
+            generation, kind, payload = self.inventory_queue.get_nowait()
+        except queue.Empty:
+            self.after(INVENTORY_POLL_MS, self._drain_inventory_queue)
+            return
+        if generation != self.load_generation:
+            self.after(1, self._drain_inventory_queue)  # Resto de una carga abortada
+            return
+
         try:
-            self.pc_list = get_pc_list()
-            self.filtered_list = self.pc_list.copy()
-            logging.debug(f"Datos cargados: {len(self.pc_list)} PCs")
+            if kind == 'chunk':
+                self._apply_inventory_chunk(payload)
+            elif kind == 'unchanged':
+                logging.info("Inventario sin cambios (revisión %s); se conserva el grid actual", payload)
+            elif kind == 'error':
+                logging.error("Error al refrescar datos: %s", payload)
+            else:
+                self._finish_inventory_load()
+        except Exception as e:
+            # Sin esto `loading` quedaría en True y no se aceptaría ningún otro refresco
+            logging.error("Error al aplicar el inventario: %s", e, exc_info=True)
+            self.load_generation += 1  # El worker deja de leer y sus bloques se descartan
+            kind = 'error'
+        finally:
+            if kind == 'chunk':
+                self.after(1, self._drain_inventory_queue)
+            else:
+                self.loading = False
+
+    def _apply_inventory_chunk(self, chunk):
+        """Agrega un bloque de registros al inventario y dibuja sus filas visibles"""
+        if not self.load_started:
+            # Primer bloque de una carga nueva: descartar el grid anterior
+            self.load_started = True
+            self.pc_list = []
+            self.filtered_list = []
+            self.hosts_by_ip = {}
+            self.host_index = None
+            self.layout.reset()
             self.create_grid()
-            # Solo ajustar ventana la primera vez o cuando se refresca completamente
-            if not self.window_size_set:
-                self.adjust_window_to_content()
-                self.window_size_set = True
+        for pc in chunk:
+            self.hosts_by_ip.setdefault(pc.ip, pc)
+        start = len(self.filtered_list)
+        matches = self._filter_records(chunk)
+        self.pc_list.extend(chunk)
+        self.filtered_list.extend(matches)
+        if self.layout.add_rows(chunk):
+            self.sync_column_widths()
+        if not self.grouped_var.get():
+            shown = self._create_flat_rows(matches, start)  # En vista agrupada se dibuja al terminar
+            self._apply_cached_state(dict.fromkeys(pc.ip for pc in shown))
+            if matches:
+                self._mark_first_grid()
+
+    def _build_quick_index(self, records):
+        """Arma el índice de la paleta fuera del hilo de Tk (~0,2 s con 10k hosts)"""
+        try:
+            index = QuickConnectIndex(records)
         except Exception as e:
-            logging.error(f"Error al refrescar datos: {e}")
+            logging.error("Error al armar el índice de conexión rápida: %s", e)
+            return
+        if records is self.pc_list:  # Si llegó otra carga mientras tanto, gana la suya
+            self.quick_index = index
+
+    def _finish_inventory_load(self):
+        """Completa la carga: puertos SSH, orden, chequeos de red y tamaño de ventana"""
+        if not self.load_started:
+            # Inventario vacío: no llegó ningún bloque
+            self.pc_list = []
+            self.filtered_list = []
+            self.hosts_by_ip = {}
+            self.layout.reset()
+            self.create_grid()
+        self.host_index = HostIndex(self.pc_list)
+        # La paleta sigue con el índice anterior (o "Cargando…") hasta que esté el nuevo
+        threading.Thread(
+            target=self._build_quick_index, args=(self.pc_list,), name='itool-quick-index', daemon=True
+        ).start()
+        mark_startup('inventory_loaded')
+        logging.debug("Datos cargados: %s PCs", len(self.pc_list))
+        if self.prober:
+            self.prober.start([pc for pc in self.hosts_by_ip.values() if pc.ip_valid])
+        if self.sort_column or self.grouped_var.get():
+            if self.sort_column:
+                self._sort_filtered()
+            self.update_grid_display()
+        else:
+            self._start_port_checks()
+            self.sync_column_widths()
+        # Solo ajustar ventana la primera vez o cuando se refresca completamente
+        if not self.window_size_set:
+            self.adjust_window_to_content()
+            self.window_size_set = True
+        self._mark_first_grid()  # Vista agrupada o inventario vacío
 
     def clear_filter(self):
         logging.info("Limpiando filtro")
@@ -598,11 +2806,9 @@ class iToolApp(tk.Tk):
 
     def adjust_window_to_content(self):
         """Ajusta la ventana al contenido - ancho fijo basado en contenido, alto para máximo 20 filas"""
-        self.update_idletasks()
-
-        # Calcular el ancho necesario basado en el contenido más largo de cada columna
+        # Ancho exacto de las columnas (incluye padding de celdas) + scrollbar y márgenes
         column_widths = self.calculate_column_widths()
-        total_width = sum(column_widths) + 60  # +60 para márgenes, padding y scrollbar
+        total_width = sum(column_widths) + self.scrollbar.winfo_reqwidth() + 30
 
         # Altura fija para siempre 20 filas
         row_height = 30  # Altura por fila
@@ -621,53 +2827,21 @@ class iToolApp(tk.Tk):
         self.maxsize(total_width, total_height)  # Fijar también la altura
 
         self.geometry(f"{total_width}x{total_height}+{x}+{y}")
-        logging.debug(f"Ventana ajustada a: {total_width}x{total_height} en posición {x},{y}")
+        logging.debug("Ventana ajustada a: %sx%s en posición %s,%s", total_width, total_height, x, y)
 
     def calculate_column_widths(self):
-        """Calcula el ancho óptimo para cada columna basado en su contenido"""
-        headers = ["Titular", "Host", "IP", "Ping", "Mirroring", "RDP", "SSH"]
-        column_widths = []
-
-        for col, header in enumerate(headers):
-            max_length = len(header)  # Empezar con la longitud del header
-
-            # Buscar el contenido más largo en cada columna usando TODA la lista, no solo filtrada
-            if col == 0:  # Titular
-                for pc in self.pc_list:  # Usar pc_list completa en lugar de filtered_list
-                    max_length = max(max_length, len(str(pc.get('titular', ''))))
-            elif col == 1:  # Host
-                for pc in self.pc_list:
-                    max_length = max(max_length, len(str(pc.get('hostname', ''))))
-            elif col == 2:  # IP
-                for pc in self.pc_list:
-                    max_length = max(max_length, len(str(pc.get('ip', ''))))
-            elif col == 3:  # Ping (solo el LED)
-                max_length = 4  # Ancho fijo para el LED
-            elif col in [4, 5, 6]:  # Botones
-                max_length = max(max_length, 8)  # Ancho mínimo para botones
-
-            # Convertir caracteres a píxeles (aproximado: 1 carácter = 8 píxeles)
-            # Reducir el padding para evitar espacio extra
-            width_pixels = max_length * 8 + 15  # +15 para padding
-            column_widths.append(width_pixels)
-
-        return column_widths
+        """Devuelve el ancho en píxeles de cada columna según el inventario cargado"""
+        return self.layout.widths()
 
     def sync_column_widths(self):
-        """Sincroniza el ancho de las columnas entre headers y contenido basado en contenido"""
-        try:
-            self.update_idletasks()
-
-            # Calcular anchos óptimos basados en contenido
-            column_widths = self.calculate_column_widths()
-
-            # Aplicar el ancho calculado a todas las columnas
-            for col, width in enumerate(column_widths):
-                self.headers_frame.grid_columnconfigure(col, minsize=width, weight=0)
-                self.scrollable_frame.grid_columnconfigure(col, minsize=width, weight=0)
-
-        except Exception as e:
-            logging.debug(f"Error al sincronizar anchos de columna: {e}")
+        """Aplica los anchos de columna a headers y contenido (sólo las columnas que cambiaron)"""
+        widths = self.calculate_column_widths()
+        for col, width in enumerate(widths):
+            if col < len(self.column_widths) and self.column_widths[col] == width:
+                continue
+            self.headers_frame.grid_columnconfigure(col, minsize=width, weight=0)
+            self.scrollable_frame.grid_columnconfigure(col, minsize=width, weight=0)
+        self.column_widths = widths
 
     def update_grid_display(self, from_sort: bool = False):
         """Actualiza la visualización del grid alineada con los headers"""
@@ -676,60 +2850,302 @@ class iToolApp(tk.Tk):
         for widget in self.scrollable_frame.winfo_children():
             widget.destroy()
         # Reiniciar seguimiento
-        self.leds.clear()
-        self.ssh_buttons.clear()
-        self.rdp_buttons.clear()
+        self._clear_row_widgets()
+        self.overflow_note = None
+
+        if self.grouped_var.get():
+            self._render_groups()
+        else:
+            self.groups = []
+            self._create_flat_rows(self.filtered_list, 0)
+        self._apply_cached_state(list(self.row_widgets))
+
+        # Actualizar botones SSH y RDP en segundo plano (omitir si es solo reordenamiento)
+        if not from_sort:
+            self._start_port_checks()
+
+            # Solo sincronizar columnas, NO ajustar ventana en cada actualización
+            self.sync_column_widths()
+
+    def _create_rows(self, pcs, start_row):
+        """Crea las filas de `pcs` en el grid a partir de la fila `start_row`.
 
+        Devuelve la lista de widgets creados (para poder destruirlos al colapsar un grupo).
+        """
+        created = []
         # Crear cada celda directamente en scrollable_frame para alinear columnas
-        for row, pc in enumerate(self.filtered_list):
+        for row, pc in enumerate(pcs, start_row):
             # Titular
-            tk.Label(self.scrollable_frame, text=pc.get('titular', ''), anchor='w',
-                    bg='white' if row % 2 == 0 else '#f0f0f0').grid(row=row, column=0, padx=2, sticky='nsew')
+            titular = tk.Label(self.scrollable_frame, text=pc.titular, anchor='w',
+                    bg='white' if row % 2 == 0 else '#f0f0f0')
+            titular.grid(row=row, column=0, padx=GRID_CELL_PADX, sticky='nsew')
             # Host
-            tk.Label(self.scrollable_frame, text=pc.get('hostname', ''), anchor='w',
-                    bg='white' if row % 2 == 0 else '#f0f0f0').grid(row=row, column=1, padx=2, sticky='nsew')
+            host = tk.Label(self.scrollable_frame, text=pc.hostname, anchor='w',
+                    bg='white' if row % 2 == 0 else '#f0f0f0')
+            host.grid(row=row, column=1, padx=GRID_CELL_PADX, sticky='nsew')
             # IP
-            tk.Label(self.scrollable_frame, text=pc.get('ip', ''), anchor='w',
-                    bg='white' if row % 2 == 0 else '#f0f0f0').grid(row=row, column=2, padx=2, sticky='nsew')
+            ip_label = tk.Label(self.scrollable_frame, text=pc.ip, anchor='w',
+                    bg='white' if row % 2 == 0 else '#f0f0f0')
+            ip_label.grid(row=row, column=2, padx=GRID_CELL_PADX, sticky='nsew')
             # LED Ping
-            led = tk.Label(self.scrollable_frame, text='●', fg='grey', font=('Arial', 12),
+            led = tk.Label(self.scrollable_frame, text='●', fg='grey', font=GRID_LED_FONT,
                           bg='white' if row % 2 == 0 else '#f0f0f0')
-            led.grid(row=row, column=3, padx=2, sticky='nsew')
-            self.leds.append((led, pc.get('ip', '')))
+            led.grid(row=row, column=3, padx=GRID_CELL_PADX, sticky='nsew')
+            widgets = self.row_widgets.setdefault(pc.ip, [])
+            widgets.append(('led', led))
             # Botón Mirroring
             btn_espejo = tk.Button(self.scrollable_frame, text='Mirroring',
-                                   command=partial(self.connect_remoto, pc.get('ip', '')))
-            btn_espejo.grid(row=row, column=4, padx=2, sticky='nsew')
-            self.rdp_buttons.append((btn_espejo, pc.get('ip', '')))  # Trackear para verificar puerto
+                                   command=partial(self.connect_remoto, pc.ip))
+            btn_espejo.grid(row=row, column=4, padx=GRID_CELL_PADX, sticky='nsew')
             # En Linux no existe soporte directo para shadow con mstsc; deshabilitar si no Windows
             if self.system != 'windows':
                 btn_espejo.config(state='disabled', text='N/A')
+            else:
+                widgets.append(('mirror', btn_espejo))  # Trackear para verificar puerto
 
             # Botón RDP
             btn_normal = tk.Button(self.scrollable_frame, text='RDP',
                                    command=partial(self.connect_login_remoto, pc))
-            btn_normal.grid(row=row, column=5, padx=2, sticky='nsew')
-            self.rdp_buttons.append((btn_normal, pc.get('ip', '')))  # Trackear para verificar puerto
+            btn_normal.grid(row=row, column=5, padx=GRID_CELL_PADX, sticky='nsew')
             if self.system != 'windows' and not self._get_linux_rdp_client():
                 btn_normal.config(state='disabled', text='N/A')
+            else:
+                widgets.append(('rdp', btn_normal))  # Trackear para verificar puerto
             # Botón SSH
             btn_ssh = tk.Button(self.scrollable_frame, text='✗', state='disabled',
                                  command=partial(self.connect_ssh, pc))
-            btn_ssh.grid(row=row, column=6, padx=2, sticky='nsew')
-            self.ssh_buttons.append((btn_ssh, pc.get('ip', '')))
+            btn_ssh.grid(row=row, column=6, padx=GRID_CELL_PADX, sticky='nsew')
+            widgets.append(('ssh', btn_ssh))
+            self.widget_state[btn_ssh] = False  # Ya creado como "cerrado"
+            created.extend((titular, host, ip_label, led, btn_espejo, btn_normal, btn_ssh))
 
             # Configurar el peso de cada fila
             self.scrollable_frame.grid_rowconfigure(row, weight=1)
+        return created
 
-        # Actualizar botones SSH y RDP en segundo plano (omitir si es solo reordenamiento)
-        if not from_sort:
-            if self.ssh_buttons:
-                threading.Thread(target=self.update_ssh_buttons_threaded, daemon=True).start()
-            if self.rdp_buttons:
-                threading.Thread(target=self.update_rdp_buttons_threaded, daemon=True).start()
+    def _create_flat_rows(self, pcs, start_row):
+        """Crea las filas de `pcs` (parte de `filtered_list`) sin pasar de GRID_MAX_ROWS.
 
-            # Solo sincronizar columnas, NO ajustar ventana en cada actualización
-            self.after(100, self.sync_column_widths)
+        Las que no entran se resumen en una fila final. Devuelve las PCs dibujadas.
+        """
+        shown = pcs[:max(GRID_MAX_ROWS - start_row, 0)]
+        self._create_rows(shown, start_row)
+        hidden = len(self.filtered_list) - GRID_MAX_ROWS
+        if hidden > 0:
+            self._show_overflow(GRID_MAX_ROWS, hidden)
+        return shown
+
+    def _show_overflow(self, row, hidden):
+        """Muestra (o actualiza) la fila final con la cantidad de PCs sin dibujar"""
+        if self.overflow_note is None:
+            self.overflow_note = tk.Label(self.scrollable_frame, anchor='w', fg='grey')
+        self.overflow_note.config(text=f"… y {hidden} PCs más sin mostrar: refiná el filtro")
+        self.overflow_note.grid(row=row, column=0, columnspan=7, padx=2, sticky='nsew')
+
+    def _apply_cached_state(self, ips):
+        """Pinta filas recién creadas con el último estado conocido de cada host.
+
+        Con workers o servicio no llega otro resultado hasta que el host cambie de
+        estado, así que sin esto las filas rehechas (filtro, orden, grupo expandido)
+        quedarían con el LED gris y los botones por defecto.
+        """
+        for ip in ips:
+            if not ip:
+                # Filas sin IP: siempre sin conexión
+                for kind in PROBE_RESULT_WIDGETS:
+                    self._apply_probe_result(kind, ip, False)
+                continue
+            for kind, cache in (('ping', self.ping_cache), ('ssh', self.ssh_port_cache),
+                                ('rdp', self.rdp_port_cache)):
+                value = cache.get(ip)
+                if value is not None:
+                    self._apply_probe_result(kind, ip, value)
+
+    def _start_port_checks(self):
+        """Lanza en segundo plano la verificación de puertos SSH y RDP"""
+        if self.prober:
+            return  # Los workers sondean de forma continua
+        ips = list(self.row_widgets)  # Snapshot tomado en el hilo de Tk
+        if ips:
+            threading.Thread(target=self.update_ssh_buttons_threaded, args=(ips,), daemon=True).start()
+            threading.Thread(target=self.update_rdp_buttons_threaded, args=(ips,), daemon=True).start()
+
+    # ---------------- Vista agrupada por VLAN ---------------- #
+    def _render_groups(self):
+        """Dibuja un encabezado por VLAN y sólo las filas de los grupos expandidos"""
+        groups = {}
+        for pc in self.filtered_list:
+            groups.setdefault(pc.ip_int >> 8 if pc.ip_int >= 0 else -1, []).append(pc)
+        # Filas contiguas: cada grupo ocupa su encabezado más sus filas expandidas
+        self.groups = []
+        row = hidden = 0
+        for key in sorted(groups, key=lambda k: (k < 0, k)):
+            if row >= GRID_MAX_ROWS:
+                hidden += len(groups[key])
+                continue
+            group = {
+                'key': key, 'hosts': groups[key], 'base_row': row,
+                'header': None, 'widgets': [], 'rows': 0, 'text': None,
+            }
+            header = tk.Label(self.scrollable_frame, anchor='w', bg=GROUP_HEADER_BG,
+                              font=("Arial", 10, "bold"), cursor="hand2")
+            header.grid(row=row, column=0, columnspan=7, padx=2, pady=(2, 0), sticky='nsew')
+            header.bind("<Button-1>", lambda e, g=group: self.toggle_group(g))
+            group['header'] = header
+            self.groups.append(group)
+            if key in self.expanded_groups:
+                self._create_group_rows(group, GRID_MAX_ROWS - row - 1)
+            row += 1 + group['rows']
+        if hidden:
+            self._show_overflow(row, hidden)
+        self._refresh_group_headers(force=True)
+
+    def _create_group_rows(self, group, room):
+        """Crea hasta `room` filas del grupo bajo su encabezado; devuelve las PCs dibujadas"""
+        hosts = group['hosts']
+        shown = hosts[:max(room, 0)]
+        group['widgets'] = self._create_rows(shown, group['base_row'] + 1)
+        group['rows'] = len(shown)
+        if len(shown) < len(hosts):
+            # Resumen de lo que no entra, como una fila más del grupo
+            note = tk.Label(self.scrollable_frame, anchor='w', fg='grey',
+                            text=f"… y {len(hosts) - len(shown)} PCs más sin mostrar: refiná el filtro")
+            note.grid(row=group['base_row'] + 1 + len(shown), column=0, columnspan=7, padx=2, sticky='nsew')
+            group['widgets'].append(note)
+            group['rows'] += 1
+        return shown
+
+    def toggle_group(self, group):
+        """Expande o colapsa un grupo y corre sólo las filas que quedan debajo"""
+        key = group['key']
+        before = group['rows']
+        if key in self.expanded_groups:
+            self.expanded_groups.discard(key)
+            self._destroy_group_rows(group)
+        else:
+            self.expanded_groups.add(key)
+            used = sum(1 + g['rows'] for g in self.groups)
+            shown = self._create_group_rows(group, GRID_MAX_ROWS - used)
+            ips = list(dict.fromkeys(pc.ip for pc in shown))
+            self._apply_cached_state(ips)
+            if not self.prober:
+                # Priorizar el grupo recién expandido (el cache se aplica al instante)
+                threading.Thread(target=self.probe_ips_threaded, args=(ips,), daemon=True).start()
+        delta = group['rows'] - before
+        if delta:
+            index = next(n for n, g in enumerate(self.groups) if g is group)
+            self._shift_groups(index + 1, delta)
+        self._refresh_group_headers(force=True)
+
+    def _shift_groups(self, first, delta):
+        """Corre `delta` filas los grupos desde el índice `first` (y la fila de resumen)"""
+        for group in self.groups[first:]:
+            group['base_row'] += delta
+            group['header'].grid_configure(row=group['base_row'])
+            # _create_rows crea 7 widgets por fila; la nota final ocupa la fila siguiente
+            for n, widget in enumerate(group['widgets']):
+                widget.grid_configure(row=group['base_row'] + 1 + n // 7)
+        if self.overflow_note is not None:
+            self.overflow_note.grid_configure(row=int(self.overflow_note.grid_info()['row']) + delta)
+
+    def _destroy_group_rows(self, group):
+        """Destruye las filas de un grupo y las quita del registro de widgets de estado"""
+        destroyed = set(group['widgets'])
+        for widget in group['widgets']:
+            self.widget_state.pop(widget, None)
+            widget.destroy()
+        group['widgets'] = []
+        group['rows'] = 0
+        for pc in group['hosts']:
+            entries = self.row_widgets.get(pc.ip)
+            if entries is None:
+                continue
+            entries[:] = [(kind, w) for kind, w in entries if w not in destroyed]
+            if not entries:
+                del self.row_widgets[pc.ip]
+
+    def _refresh_group_headers(self, force=False):
+        """Recalcula los contadores de cada VLAN desde los caches de sondeo"""
+        if not self.groups:
+            return
+        now = time.monotonic()
+        if not force and now - self.group_headers_at < GROUP_HEADER_REFRESH:
+            return
+        self.group_headers_at = now
+        for group in self.groups:
+            key = group['key']
+            online = rdp = ssh = 0
+            for pc in group['hosts']:
+                ip = pc.ip
+                online += self.ping_cache.get(ip, False)
+                rdp += self.rdp_port_cache.get(ip, False)
+                ssh += self.ssh_port_cache.get(ip, False)
+            arrow = '▼' if key in self.expanded_groups else '▶'
+            if key >= 0:
+                label = f"VLAN {key & 0xFF}  ({ipaddress.IPv4Address(key << 8)}/24)"
+            else:
+                label = "Sin IPv4"
+            text = (f"{arrow} {label} — {len(group['hosts'])} PCs · {online} online · "
+                    f"{rdp} RDP · {ssh} SSH")
+            if text != group['text']:
+                group['text'] = text
+                group['header'].config(text=text)
+
+    def _collapsed_sample(self, size):
+        """Devuelve hasta `size` IPs de grupos colapsados, rotando entre llamadas"""
+        ips = [
+            pc.ip for group in self.groups if group['key'] not in self.expanded_groups
+            for pc in group['hosts'] if pc.ip_valid
+        ]
+        if not ips:
+            return []
+        start = self.group_sample_cursor % len(ips)
+        sample = (ips[start:] + ips[:start])[:size]
+        self.group_sample_cursor = start + len(sample)
+        return sample
+
+    def _clear_row_widgets(self):
+        """Olvida los widgets de estado; los resultados pendientes para ellos se descartan"""
+        self.row_widgets = {}
+        self.widget_state = {}
+
+    def post_probe_result(self, kind, ip, value):
+        """Encola un resultado de sondeo ('ping', 'ssh' o 'rdp'). Seguro desde cualquier hilo"""
+        self.ui_updates.put((kind, ip, value))
+
+    def _drain_ui_updates(self):
+        """Aplica los resultados encolados en lotes acotados a ~un frame de trabajo"""
+        deadline = time.perf_counter() + UI_BATCH_BUDGET
+        processed = 0
+        while True:
+            try:
+                kind, ip, value = self.ui_updates.get_nowait()
+            except queue.Empty:
+                break
+            self._apply_probe_result(kind, ip, value)
+            processed += 1
+            if processed % 64 == 0 and time.perf_counter() >= deadline:
+                break
+        if processed and self.groups:
+            self._refresh_group_headers()
+        self.after(1 if not self.ui_updates.empty() else UI_FRAME_MS, self._drain_ui_updates)
+
+    def _apply_probe_result(self, kind, ip, value):
+        """Aplica un resultado sólo a los widgets cuyo estado realmente cambia"""
+        widgets = self.row_widgets.get(ip)
+        if not widgets:
+            self.ui_stats['dropped'] += 1  # La fila ya no existe (grid rehecho/filtrado)
+            return
+        targets = PROBE_RESULT_WIDGETS[kind]
+        for widget_kind, widget in widgets:
+            if widget_kind not in targets:
+                continue
+            if self.widget_state.get(widget) == value:
+                self.ui_stats['skipped'] += 1
+                continue
+            self.widget_state[widget] = value
+            WIDGET_APPLIERS[widget_kind](widget, value)
+            self.ui_stats['applied'] += 1
 
     def create_grid(self):
         """Inicializa el grid básico"""
@@ -739,9 +3155,7 @@ class iToolApp(tk.Tk):
         for widget in self.scrollable_frame.winfo_children():
             widget.destroy()
 
-        self.leds.clear()
-        self.ssh_buttons.clear()
-        self.rdp_buttons.clear()
+        self._clear_row_widgets()
 
         # Actualizar headers fijos
         self.create_fixed_headers()
@@ -749,35 +3163,77 @@ class iToolApp(tk.Tk):
         # Actualizar la visualización con las PCs
         self.update_grid_display()
 
-    def update_ssh_buttons_threaded(self):
+    def update_ssh_buttons_threaded(self, ips):
         """Actualiza botones SSH en un hilo separado"""
         try:
-            asyncio.run(update_ssh_buttons_async(self.ssh_buttons, self))
+            asyncio.run(update_ssh_buttons_async(ips, self))
         except Exception as e:
-            logging.error(f"Error al actualizar botones SSH: {e}")
+            logging.error("Error al actualizar botones SSH: %s", e)
 
-    def update_rdp_buttons_threaded(self):
+    def update_rdp_buttons_threaded(self, ips):
         """Actualiza botones RDP en un hilo separado"""
         try:
-            asyncio.run(update_rdp_buttons_async(self.rdp_buttons, self))
+            asyncio.run(update_rdp_buttons_async(ips, self))
+        except Exception as e:
+            logging.error("Error al actualizar botones RDP: %s", e)
+
+    def probe_ips_threaded(self, ips):
+        """Ping y puertos SSH/RDP de `ips` en un hilo separado"""
+        try:
+            asyncio.run(probe_ips_async(ips, self))
+        except Exception as e:
+            logging.error("Error al sondear hosts: %s", e)
+
+    def update_leds_threaded(self, ips):
+        """Actualiza LEDs en un hilo separado (el ping no bloquea el hilo de Tk)"""
+        try:
+            asyncio.run(update_leds_async(ips, self))
         except Exception as e:
-            logging.error(f"Error al actualizar botones RDP: {e}")
+            logging.error("Error al actualizar LEDs: %s", e)
+        finally:
+            self.leds_running = False
 
     def update_leds(self):
-        if self.leds:
-            try:
-                asyncio.run(update_leds_async(self.leds, self))
-            except Exception as e:
-                logging.error(f"Error al actualizar LEDs: {e}")
+        if self.row_widgets and not self.prober and not self.leds_running:
+            self.leds_running = True
+            ips = list(self.row_widgets)
+            threading.Thread(target=self.update_leds_threaded, args=(ips,), daemon=True).start()
+        if self.groups and not self.prober:
+            # Muestreo de baja tasa de los grupos colapsados para sus contadores
+            sample = self._collapsed_sample(GROUP_SAMPLE_SIZE)
+            if sample:
+                threading.Thread(target=self.probe_ips_threaded, args=(sample,), daemon=True).start()
+        logging.debug(
+            "Actualizaciones de UI: %(applied)d aplicadas, %(skipped)d sin cambios, "
+            "%(dropped)d descartadas", self.ui_stats
+        )
+        logging.debug("Timeouts de sondeo: %s", RTT_ESTIMATOR.describe())
         self.after(10 * 1000, self.update_leds)
 
+    def _poll_prober(self):
+        """Vuelca el estado de los workers o del servicio a los caches y a los widgets"""
+        try:
+            for ip, status in self.prober.poll():
+                self.ping_cache[ip] = status.online
+                self.ssh_port_cache[ip] = status.ssh_open
+                self.rdp_port_cache[ip] = status.rdp_open
+                self.last_check_time[ip] = status.checked_at
+                if ip in self.row_widgets:
+                    self._apply_probe_result('ping', ip, status.online)
+                    self._apply_probe_result('ssh', ip, status.ssh_open)
+                    self._apply_probe_result('rdp', ip, status.rdp_open)
+            self._refresh_group_headers()
+        except Exception as e:
+            logging.error("Error al leer el estado de los workers: %s", e)
+        self.after(PROBER_POLL_MS, self._poll_prober)
+
     def connect_remoto(self, ip):
         """Ejecuta mstsc en modo espejo usando la IP"""
         if not ip:
             logging.warning("No se puede conectar: IP vacía")
             return
         if self.system == 'windows':
-            logging.info(f"Conectando en modo espejo a {ip} (Windows)")
+            logging.info("Conectando en modo espejo a %s (Windows)", ip)
             comando = [
                 'mstsc',
                 '/shadow:1',
@@ -796,7 +3252,7 @@ class iToolApp(tk.Tk):
             if not rdp_client:
                 logging.warning("Cliente RDP no disponible en Linux (instala xfreerdp o remmina)")
                 return
-            logging.info(f"Conectando (modo simple) a {ip} usando {rdp_client}")
+            logging.info("Conectando (modo simple) a %s usando %s", ip, rdp_client)
             if 'xfreerdp' in rdp_client:
                 comando = [rdp_client, f"/v:{ip}", '/cert:ignore']
             elif 'remmina' in rdp_client:
@@ -806,23 +3262,23 @@ class iToolApp(tk.Tk):
             try:
                 subprocess.Popen(comando)
             except Exception as e:
-                logging.error(f"Error lanzando cliente RDP Linux: {e}")
+                logging.error("Error lanzando cliente RDP Linux: %s", e)
 
     def connect_login_remoto(self, pc):
         """Conecta usando credenciales del PC"""
-        if not pc.get('ip', '') or not pc.get('usuario', '') or not pc.get('contrasenia', ''):
+        if not pc.ip or not pc.usuario or not pc.contrasenia:
             logging.warning("Datos incompletos para conexión normal")
             return
-        ip = pc["ip"]
+        ip = pc.ip
         if self.system == 'windows':
-            logging.info(f"Conectando normalmente a {ip} (Windows)")
+            logging.info("Conectando normalmente a %s (Windows)", ip)
             # Guarda las credenciales en el Administrador de Credenciales de Windows
             try:
                 subprocess.call([
                     'cmdkey',
                     f'/add:TERMSRV/{ip}',
-                    f'/user:{pc["usuario"]}',
-                    f'/pass:{pc["contrasenia"]}'
+                    f'/user:{pc.usuario}',
+                    f'/pass:{pc.contrasenia}'
                 ])
             except FileNotFoundError:
                 logging.error("cmdkey no encontrado")
@@ -853,7 +3309,7 @@ class iToolApp(tk.Tk):
                 if line.strip().startswith('full address:s:'):
                     new_lines.append(f'full address:s:{ip}\r\n')
                 elif line.strip().startswith('username:s:'):
-                    new_lines.append(f'username:s:{pc["usuario"]}\r\n')
+                    new_lines.append(f'username:s:{pc.usuario}\r\n')
                     username_set = True
                 elif line.strip().startswith('prompt for credentials:i:'):
                     new_lines.append('prompt for credentials:i:0\r\n')
@@ -863,11 +3319,11 @@ class iToolApp(tk.Tk):
                     new_lines.append(line)
 
             if not username_set:
-                new_lines.append(f'username:s:{pc["usuario"]}\r\n')
+                new_lines.append(f'username:s:{pc.usuario}\r\n')
                 new_lines.append('prompt for credentials:i:0\r\n')
                 new_lines.append('promptcredentialonce:i:1\r\n')
 
-            temp_rdp = f'{pc.get("hostname", "pc")}.rdp'
+            temp_rdp = f'{pc.hostname or "pc"}.rdp'
             with open(temp_rdp, 'w', encoding='utf-16') as f:
                 f.writelines(new_lines)
 
@@ -886,34 +3342,29 @@ class iToolApp(tk.Tk):
             if not rdp_client:
                 logging.warning("No se encontró cliente RDP (instala xfreerdp o remmina)")
                 return
-            logging.info(f"Conectando a {ip} con {rdp_client} (Linux)")
+            logging.info("Conectando a %s con %s (Linux)", ip, rdp_client)
             if 'xfreerdp' in rdp_client:
-                comando = [rdp_client, f"/v:{ip}", f"/u:{pc['usuario']}", f"/p:{pc['contrasenia']}", '/cert:ignore']
+                comando = [rdp_client, f"/v:{ip}", f"/u:{pc.usuario}", f"/p:{pc.contrasenia}", '/cert:ignore']
             elif 'remmina' in rdp_client:
                 # Remmina no acepta user/pass directamente en CLI simple, se usa URL
-                comando = [rdp_client, f"--conn=rdp://{pc['usuario']}:{pc['contrasenia']}@{ip}"]
+                comando = [rdp_client, f"--conn=rdp://{pc.usuario}:{pc.contrasenia}@{ip}"]
             else:
                 comando = [rdp_client, ip]
             try:
                 subprocess.Popen(comando)
             except Exception as e:
-                logging.error(f"Error iniciando cliente RDP Linux: {e}")
+                logging.error("Error iniciando cliente RDP Linux: %s", e)
 
     def connect_ssh(self, pc):
-        if not pc or not pc.get('ip', ''):
+        if not pc or not pc.ip:
             return
 
-        ip = pc.get('ip', '')
-        usuario = pc.get('usuario', '')
-        contrasenia = pc.get('contrasenia', '')
+        ip = pc.ip
+        usuario = pc.usuario
+        contrasenia = pc.contrasenia
 
-        # Determinar el puerto SSH según la IP
-        if ip == "192.168.3.220" or ip == "192.168.3.143" or ip == "192.168.3.235":
-            current_ssh_port = 22
-        elif ip == "192.168.3.53":
-            current_ssh_port = 16166
-        else:
-            current_ssh_port = ssh_port
+        # Determinar el puerto SSH según la IP (o la columna puerto_ssh)
+        current_ssh_port = get_ssh_port(ip, pc)
 
         if self.system == 'windows':
             unique_id = uuid.uuid4().hex[:8]
@@ -957,13 +3408,13 @@ del "%~f0"
                         launched = True
                         break
                     except Exception as e:
-                        logging.debug(f"Fallo lanzando {name}: {e}")
+                        logging.debug("Fallo lanzando %s: %s", name, e)
             if not launched:
                 logging.warning("No se encontró un emulador de terminal compatible; no se puede mostrar la contraseña antes de ssh. Instalá gnome-terminal, konsole o xterm.")
                 try:
                     subprocess.Popen(['ssh', f'{usuario}@{ip}', '-p', str(current_ssh_port)])
                 except Exception as e:
-                    logging.error(f"No se pudo lanzar SSH: {e}")
+                    logging.error("No se pudo lanzar SSH: %s", e)
 
     # ---------------- Utilidades específicas de plataforma ---------------- #
     def _get_linux_rdp_client(self):
@@ -975,7 +3426,67 @@ del "%~f0"
                 return candidate
         return None
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='itool', description='iTool - acceso remoto a PCs')
+    parser.add_argument(
+        '--inventory', metavar='SPEC',
+        help="Fuente de inventario: 'sheets', 'csv:ruta', 'json:ruta', 'ndjson:ruta', "
+             "'sqlite:ruta[#tabla]' o una ruta (tipo según extensión). "
+             "Por defecto, la clave 'inventory' de config.json o Google Sheets."
+    )
+    parser.add_argument(
+        '--probe-workers', type=int, metavar='N',
+        help="Sondear con N procesos worker y memoria compartida (0 = en la UI)."
+    )
+    parser.add_argument(
+        '--shard-strategy', choices=SHARD_STRATEGIES,
+        help="Reparto de hosts entre workers: por subred /24 o round robin."
+    )
+    parser.add_argument(
+        '--probe-service', metavar='URL',
+        help="Tomar el estado de los hosts de un servicio de sondeo compartido "
+             "(p. ej. http://127.0.0.1:8765) en lugar de sondear la red."
+    )
+    parser.add_argument(
+        '--serve-probes', metavar='[HOST:]PUERTO', nargs='?', const='',
+        help="Correr sólo el servicio de sondeo compartido, sin interfaz gráfica "
+             f"(por defecto probe.listen de config.json o {SERVICE_LISTEN}). "
+             "También expone métricas de Prometheus en /metrics."
+    )
+    parser.add_argument(
+        '--metrics-textfile', metavar='ARCHIVO',
+        help="Con --serve-probes, escribir además las métricas tras cada barrido "
+             "(textfile collector de node_exporter, extensión .prom)."
+    )
+    parser.add_argument(
+        '--startup-report', metavar='ARCHIVO',
+        help="Escribir los tiempos de arranque (JSON) al mostrar el primer grid y salir."
+    )
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Workers de sondeo en el ejecutable de PyInstaller
+    args = parse_args()
+    setup_logging(CONFIG.get('log'))
     logging.info("Iniciando iTool")
-    app = iToolApp()
+    if args.inventory:
+        set_inventory(create_inventory(args.inventory, base_dir=os.getcwd()))
+    probe_options = dict(CONFIG.get('probe') or {})
+    if args.probe_workers is not None:
+        probe_options['workers'] = args.probe_workers
+    if args.shard_strategy:
+        probe_options['shard_strategy'] = args.shard_strategy
+    if args.probe_service is not None:
+        probe_options['service'] = args.probe_service
+    if args.serve_probes is not None:
+        options = {**PROBE_DEFAULTS, **probe_options}
+        service = ProbeService(
+            get_inventory(), float(options['interval']), int(options['concurrency']),
+            int(options['workers']), options['shard_strategy'],
+            reload_interval=float(options.get('reload', SERVICE_RELOAD)),
+            metrics_textfile=args.metrics_textfile or options.get('metrics_textfile')
+        )
+        service.serve_forever(args.serve_probes or options.get('listen') or SERVICE_LISTEN)
+        sys.exit(0)
+    app = iToolApp(probe_options=probe_options, startup_report=args.startup_report)
     app.mainloop()
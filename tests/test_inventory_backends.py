@@ -0,0 +1,128 @@
+"""Backends de inventario en archivo: CSV, JSON, NDJSON y SQLite.
+
+Cada fixture escribe el mismo inventario en un formato; se comprueba la lectura,
+la proyección a HostRecord, el armado de bloques y la detección de cambios.
+"""
+import json
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+COLUMNS = ['titular', 'hostname', 'ip', 'usuario', 'contrasenia', 'puerto_ssh', 'notas']
+ROWS = [
+    ['Área 1', 'PC-1', '10.0.0.1', 'admin', 'cla;ve', '2222', 'con, coma'],
+    ['Área 2', 'PC-2', '10.0.0.2', 'admin', 'clave', '', ''],
+    ['', '', '', '', '', '', ''],  # Fila vacía: se descarta
+    ['Área 3', 'PC-3', 'sin ip', 'root', 'otra', '', 'x'],
+]
+
+
+def hostnames(records):
+    return [pc.hostname for pc in records]
+
+
+def check_records(records):
+    assert hostnames(records) == ['PC-1', 'PC-2', 'PC-3']
+    first = records[0]
+    assert (first.titular, first.ip, first.contrasenia, first.puerto_ssh) == ('Área 1', '10.0.0.1', 'cla;ve', 2222)
+    assert records[0].ip_valid and not records[2].ip_valid
+
+
+def write_delimited(path, delimiter):
+    lines = [delimiter.join(COLUMNS)]
+    for row in ROWS:
+        lines.append(delimiter.join(f'"{v}"' if delimiter in v or ',' in v else v for v in row))
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8-sig')
+
+
+@pytest.mark.parametrize('delimiter', [',', ';', '\t'])
+def test_csv_sniffs_delimiter(tmp_path, delimiter):
+    path = tmp_path / 'inventario.csv'
+    write_delimited(path, delimiter)
+    inventory = main.create_inventory(f'csv:{path}')
+    assert isinstance(inventory, main.CsvInventory)
+    records, changed = inventory.fetch()
+    assert changed
+    check_records(records)
+
+
+def test_json_array_streams_across_reads(tmp_path, monkeypatch):
+    path = tmp_path / 'inventario.json'
+    path.write_text(
+        json.dumps([dict(zip(COLUMNS, row)) for row in ROWS], ensure_ascii=False, indent=2),
+        encoding='utf-8'
+    )
+    monkeypatch.setattr(main.JsonInventory, 'READ_SIZE', 16)  # Objetos partidos entre lecturas
+    inventory = main.create_inventory(str(path))
+    assert isinstance(inventory, main.JsonInventory) and not inventory.ndjson
+    records, _ = inventory.fetch()
+    check_records(records)
+
+
+def test_ndjson_skips_blank_lines(tmp_path):
+    path = tmp_path / 'inventario.ndjson'
+    lines = [json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False) for row in ROWS]
+    path.write_text('\n\n'.join(lines) + '\n', encoding='utf-8')
+    inventory = main.create_inventory(str(path))
+    assert inventory.ndjson
+    records, _ = inventory.fetch()
+    check_records(records)
+
+
+def test_sqlite_reads_named_table(tmp_path):
+    path = tmp_path / 'inventario.db'
+    conn = sqlite3.connect(str(path))
+    conn.execute(f"CREATE TABLE equipos ({', '.join(COLUMNS)})")
+    conn.executemany(f"INSERT INTO equipos VALUES ({', '.join('?' * len(COLUMNS))})", ROWS)
+    conn.commit()
+    conn.close()
+    inventory = main.create_inventory(f'sqlite:{path}#equipos')
+    assert isinstance(inventory, main.SqliteInventory) and inventory.table == 'equipos'
+    records, _ = inventory.fetch()
+    check_records(records)
+
+
+def test_iter_chunks_yields_bounded_blocks(tmp_path):
+    path = tmp_path / 'grande.csv'
+    lines = [','.join(COLUMNS)] + [f'Área,PC-{i},10.0.{i // 256}.{i % 256},admin,clave,,' for i in range(1234)]
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    inventory = main.create_inventory(f'csv:{path}')
+    chunks = list(inventory.iter_chunks(chunk_size=500, revision='r1'))
+    assert [len(chunk) for chunk in chunks] == [500, 500, 234]
+    assert inventory.records == [pc for chunk in chunks for pc in chunk]
+    assert inventory.loaded and inventory.revision == 'r1'
+
+
+def test_fetch_rereads_only_when_file_changes(tmp_path):
+    path = tmp_path / 'inventario.csv'
+    write_delimited(path, ',')
+    inventory = main.create_inventory(f'csv:{path}')
+    records, changed = inventory.fetch()
+    assert changed
+    again, changed = inventory.fetch()
+    assert not changed and again is records
+
+    path.write_text(','.join(COLUMNS) + '\nÁrea 9,PC-9,10.0.0.9,admin,clave,,\n', encoding='utf-8')
+    records, changed = inventory.fetch()
+    assert changed and hostnames(records) == ['PC-9']
+
+
+def test_relative_paths_resolve_against_base_dir(tmp_path):
+    inventory = main.create_inventory('csv:inventario.csv', base_dir=str(tmp_path))
+    assert inventory.path == os.path.join(str(tmp_path), 'inventario.csv')
+    default = main.create_inventory('inventario.csv')
+    assert default.path == os.path.join(main.APP_DIR, 'inventario.csv')
+
+
+def test_backend_requires_iter_rows():
+    class Incompleto(main.InventoryBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Incompleto()
@@ -0,0 +1,40 @@
+"""Rotación por antigüedad del log: se mide desde el primer registro del archivo."""
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+
+def make_record(message='hola'):
+    return logging.LogRecord('itool', logging.INFO, __file__, 1, message, None, None)
+
+
+def test_age_counts_from_first_record_not_last_write(tmp_path):
+    path = tmp_path / 'itool.log'
+    started = time.time() - 3 * 3600
+    first = time.strftime(main.LOG_TIME_FORMAT, time.localtime(started))
+    path.write_text(f'{first},123 - INFO - Iniciando iTool\n', encoding='utf-8')
+    os.utime(path)  # Escrito recién: el mtime no sirve para medir la antigüedad
+
+    handler = main.SizeAgeRotatingFileHandler(str(path), max_age_seconds=2 * 3600, backupCount=1, delay=True)
+    try:
+        assert abs(handler.opened_at - started) < 2
+        assert handler.shouldRollover(make_record())
+        handler.doRollover()
+        assert (tmp_path / 'itool.log.1').exists()
+        assert not handler.shouldRollover(make_record())
+    finally:
+        handler.close()
+
+
+def test_empty_or_missing_file_starts_now(tmp_path):
+    handler = main.SizeAgeRotatingFileHandler(str(tmp_path / 'nuevo.log'), max_age_seconds=60, delay=True)
+    try:
+        assert time.time() - handler.opened_at < 5
+        assert not handler.shouldRollover(make_record())
+    finally:
+        handler.close()
@@ -0,0 +1,125 @@
+"""Servicio de sondeo compartido sobre loopback: ProbeService + ProbeServiceClient.
+
+Un socket escuchando en 127.0.0.2 hace de puerto SSH abierto y 127.0.0.3 tiene
+el puerto cerrado; se sondea sin ping, así que no hace falta red ni privilegios.
+"""
+import errno
+import os
+import socket
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+OPEN_HOST = '127.0.0.2'
+CLOSED_HOST = '127.0.0.3'
+
+
+def wait_for(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = predicate()
+        if result:
+            return result
+        time.sleep(0.05)
+    raise AssertionError("Tiempo de espera agotado")
+
+
+@pytest.fixture
+def ssh_listener():
+    listener = socket.socket()
+    listener.bind((OPEN_HOST, 0))
+    listener.listen()
+    yield listener
+    listener.close()
+
+
+@pytest.fixture
+def inventory(tmp_path, ssh_listener):
+    path = tmp_path / 'inventario.csv'
+    path.write_text(
+        'titular,hostname,ip,usuario,contrasenia,puerto_ssh\n'
+        f'Área 1,PC-1,{OPEN_HOST},admin,clave,{ssh_listener.getsockname()[1]}\n'
+        f'Área 2,PC-2,{CLOSED_HOST},admin,clave,9\n'
+        'Área 3,PC-3,sin ip,admin,clave,\n',
+        encoding='utf-8'
+    )
+    return main.create_inventory(f'csv:{path}')
+
+
+@pytest.fixture
+def service(inventory):
+    svc = main.ProbeService(inventory, interval=0.2, probe_ping=False)
+    host, port = svc.start('127.0.0.1:0')
+    yield svc, f'http://{host}:{port}'
+    svc.stop()
+
+
+@pytest.fixture
+def client(service):
+    client = main.ProbeServiceClient(service[1])
+    yield client
+    client.stop()
+
+
+def test_status_publishes_probed_inventory(service, client):
+    svc, _ = service
+    wait_for(lambda: svc.sweeps)
+    payload = client._fetch('/status', 5)
+    assert payload['full'] and payload['epoch'] == svc.store.epoch
+    hosts = {ip: main.ProbeStatus(*values) for ip, values in payload['hosts'].items()}
+    assert set(hosts) == {OPEN_HOST, CLOSED_HOST}  # El host sin IP no se sondea
+    assert hosts[OPEN_HOST].ssh_open and hosts[OPEN_HOST].online
+    assert not hosts[CLOSED_HOST].ssh_open and not hosts[CLOSED_HOST].online
+
+
+def test_changes_reach_subscribed_client(client, ssh_listener):
+    client.start([])
+    changed = {}
+    wait_for(lambda: changed.update(client.poll()) or len(changed) == 2)
+    assert changed[OPEN_HOST].ssh_open and not changed[CLOSED_HOST].ssh_open
+    assert client.status(OPEN_HOST).ssh_open
+    assert client.poll() == []  # Sin cambios nuevos no se entrega nada
+    seq = client.seq
+
+    ssh_listener.close()
+    (ip, status), = wait_for(client.poll)
+    assert ip == OPEN_HOST and not status.ssh_open and not status.online
+    assert client.seq > seq
+
+
+def test_changes_with_unknown_epoch_returns_full_state(service, client):
+    svc, _ = service
+    wait_for(lambda: svc.sweeps)
+    started = time.monotonic()
+    payload = client._fetch('/changes?since=999&epoch=otro', 5)
+    assert time.monotonic() - started < 2  # No espera el long poll
+    assert payload['full'] and set(payload['hosts']) == {OPEN_HOST, CLOSED_HOST}
+
+
+def test_sharded_service_reports_sweeps_per_worker(inventory):
+    svc = main.ProbeService(inventory, interval=0.2, workers=2, strategy='round_robin', probe_ping=False)
+    svc.start('127.0.0.1:0')
+    try:
+        wait_for(lambda: svc.sweeps >= 2, timeout=30)
+        svc.render_metrics()
+        metrics = svc.metrics.decode('utf-8')
+    finally:
+        svc.stop()
+    assert len(svc.shard_stats) == 2 and all(stats.sweeps >= 2 for stats in svc.shard_stats)
+    assert 'itool_sweep_duration_seconds ' in metrics
+    assert 'itool_shard_sweeps_total{shard="1"}' in metrics
+    assert 'itool_probe_errors_total{kind="probe"} 0' in metrics
+
+
+def test_probe_error_counter_ignores_network_answers():
+    counter = main.ProbeErrorCounter()
+    assert not counter.record(ConnectionRefusedError(errno.ECONNREFUSED, 'rechazado'))
+    assert not counter.record(OSError(errno.EHOSTUNREACH, 'sin ruta'))
+    assert counter.record(OSError(errno.EMFILE, 'demasiados archivos abiertos'))
+    assert counter.record(RuntimeError('executor cerrado'))
+    assert counter.count == 2
@@ -0,0 +1,89 @@
+"""SheetsInventory contra una hoja falsa: lectura proyectada y detección de cambios.
+
+`FakeWorksheet` imita `row_values(1)` y `batch_get(ranges)` de gspread sobre una
+tabla en memoria y registra los rangos pedidos; la revisión la da un callable.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+HEADER = ['ubicacion', 'titular', 'hostname', 'notas', 'ip', 'usuario', 'contrasenia', 'puerto_ssh']
+ROWS = [
+    ['Piso 1', 'Área 1', 'PC-1', 'nada', '10.0.0.1', 'admin', 'clave', '2222'],
+    ['Piso 2', 'Área 2', 'PC-2', '', '10.0.0.2', 'admin', 'clave'],  # Fila recortada por la API
+    [],
+    ['Piso 3', 'Área 3', 'PC-3', 'x', '10.0.0.3', 'root', 'otra', ''],
+]
+
+
+class FakeWorksheet:
+    def __init__(self, header, rows):
+        self.header = header
+        self.rows = rows
+        self.batch_calls = []
+
+    def row_values(self, index):
+        assert index == 1
+        return list(self.header)
+
+    def batch_get(self, ranges):
+        self.batch_calls.append(list(ranges))
+        columns = []
+        for rng in ranges:
+            letter = rng.split(':')[0].rstrip('0123456789')
+            index = column_index(letter)
+            column = [[row[index]] if index < len(row) and row[index] != '' else [] for row in self.rows]
+            while column and not column[-1]:
+                column.pop()  # Como la API, sin celdas vacías al final
+            columns.append(column)
+        return columns
+
+
+def column_index(letter):
+    index = 0
+    for ch in letter:
+        index = index * 26 + ord(ch) - ord('A') + 1
+    return index - 1
+
+
+def test_requests_only_used_columns():
+    worksheet = FakeWorksheet(HEADER, ROWS)
+    inventory = main.SheetsInventory(worksheet=worksheet, revision_fn=lambda: 'r1')
+    records, changed = inventory.fetch()
+
+    assert changed
+    ranges, = worksheet.batch_calls
+    assert ranges == ['B2:B', 'C2:C', 'E2:E', 'F2:F', 'G2:G', 'H2:H']  # Sin 'ubicacion' ni 'notas'
+    assert [pc.hostname for pc in records] == ['PC-1', 'PC-2', 'PC-3']
+    assert records[0].titular == 'Área 1' and records[0].puerto_ssh == 2222
+    assert records[2].usuario == 'root' and records[2].contrasenia == 'otra'
+
+
+def test_unchanged_revision_skips_download_and_rebuild():
+    worksheet = FakeWorksheet(HEADER, ROWS)
+    revision = ['r1']
+    inventory = main.SheetsInventory(worksheet=worksheet, revision_fn=lambda: revision[0])
+    records, changed = inventory.fetch()
+    assert changed and len(worksheet.batch_calls) == 1
+
+    again, changed = inventory.fetch()
+    assert not changed
+    assert again is records  # Mismos HostRecord, sin reconstruir
+    assert len(worksheet.batch_calls) == 1
+
+    revision[0] = 'r2'
+    worksheet.rows = ROWS[:1]
+    updated, changed = inventory.fetch()
+    assert changed and len(worksheet.batch_calls) == 2
+    assert [pc.hostname for pc in updated] == ['PC-1']
+
+
+def test_unknown_revision_always_reads():
+    worksheet = FakeWorksheet(HEADER, ROWS)
+    inventory = main.SheetsInventory(worksheet=worksheet, revision_fn=lambda: None)
+    inventory.fetch()
+    _, changed = inventory.fetch()
+    assert changed and len(worksheet.batch_calls) == 2